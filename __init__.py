@@ -8,93 +8,127 @@ bl_info = {
     "category": "Interface",
 }
 
+import time
 import bpy
 from . import ui
-from . import core
 from . import preferences
+from . import redraw
 from . import operators
+from . import discovery
 from . import drawing
 from . import overlay
-from .constants import ADDON_ID
+from . import scheduler
+from . import usage
+from . import snapshot
+from . import workspace
+from .constants import ADDON_ID, log, set_log_level
+from .metrics import startup_times
 from bpy.app.handlers import persistent
 
-@persistent
-def load_handler(dummy):
+def _upgrade_prefs():
     """
-    Re-apply filtering if it was active.
+    First-idle task: brings groups stored by older versions up to date.
+    Kept out of draw code, it writes to collections the UI lists iterate.
     """
     try:
         prefs = bpy.context.preferences.addons[ADDON_ID].preferences
-        # Initial scan to ensure we have data
-        core.PanelScanner.ensure_original_categories_stored()
-        
-        if prefs.is_filtering and prefs.active_group_index >= 0:
-            if prefs.active_group_index < len(prefs.groups):
-                group = prefs.groups[prefs.active_group_index]
-                print(f"N-Panel Manager: Restoring group '{group.name}'")
-                core.PanelManager.apply_group(bpy.context, group.name)
+        preferences.migrate_groups(prefs)
+        # Older versions allowed duplicate names and didn't track renames
+        preferences.sync_group_names(prefs)
     except Exception as e:
-        print(f"N-Panel Manager Load Error: {e}")
+        log.error("Could not upgrade stored groups: %s", e)
+    return None
 
-_last_workspace = None
 
-@persistent
-def workspace_handler(scene):
-    global _last_workspace
+def _deferred_restore():
+    """First-idle task: re-applies the persisted group after a file load."""
+    start = time.perf_counter()
+    if bpy.app.timers.is_registered(_upgrade_prefs):
+        bpy.app.timers.unregister(_upgrade_prefs)
+    _upgrade_prefs()
     try:
-        context = bpy.context
-        if not context.window or not context.workspace:
-            return
-            
-        current_workspace = context.workspace
-        
-        if _last_workspace != current_workspace:
-            _last_workspace = current_workspace
-            
-            # Workspace changed, check if we need to switch groups
-            prefs = context.preferences.addons[ADDON_ID].preferences
-            
-            for i, group in enumerate(prefs.groups):
-                if group.workspace_name and group.workspace_name == current_workspace.name:
-                    print(f"N-Panel Manager: Workspace '{current_workspace.name}' detected. Switching to group '{group.name}'")
-                    # We found a match! Apply it.
-                    core.PanelManager.apply_group(context, group.name)
-                    prefs.active_group_index = i
-                    prefs.is_filtering = True
-                    return 
-                    
+        prefs = bpy.context.preferences.addons[ADDON_ID].preferences
+        if prefs.is_filtering and 0 <= prefs.active_group_index < len(prefs.groups):
+            group = prefs.groups[prefs.active_group_index]
+            log.info("Restoring group '%s'", group.name)
+            # Skips all work when the live layout already matches
+            scheduler.apply_now(prefs.active_group_index)
     except Exception as e:
-        # Avoid spamming errors in depsgraph loop
-        pass
+        log.error("Load error: %s", e)
+        return None
+
+    elapsed = time.perf_counter() - start
+    if startup_times["first_restore"] is None:
+        startup_times["first_restore"] = elapsed
+        log.info("First restore took %.1f ms", elapsed * 1000)
+    return None
+
+
+@persistent
+def load_handler(dummy):
+    """
+    Re-apply filtering if it was active.
+    Nothing heavy runs during load_post, the restore waits for the first idle tick.
+    """
+    # Loading a file clears msgbus subscriptions
+    workspace.subscribe()
+    # New file, new areas: per-area groups start over
+    scheduler.clear_areas()
+    if not bpy.app.timers.is_registered(_deferred_restore):
+        bpy.app.timers.register(_deferred_restore, first_interval=0.0)
+
 
 def register():
-    print("[N-Panel Manager] Starting registration...")
+    start = time.perf_counter()
+    log.debug("Starting registration...")
+    snapshot.load()
     preferences.register()
-    print("[N-Panel Manager] Preferences done. Registering operators...")
+    bpy.app.timers.register(_upgrade_prefs, first_interval=0.0)
+    try:
+        set_log_level(bpy.context.preferences.addons[ADDON_ID].preferences.log_level)
+    except (AttributeError, KeyError):
+        pass  # First enable, defaults apply
+    log.debug("Preferences done. Registering operators...")
     operators.register_classes()
-    print("[N-Panel Manager] Operators done. Registering UI...")
+    log.debug("Operators done. Registering UI...")
     ui.register()
-    print("[N-Panel Manager] UI done. Adding handlers...")
+    log.debug("UI done. Adding handlers...")
+    scheduler.register()
+    redraw.register()
+    usage.register()
     bpy.app.handlers.load_post.append(load_handler)
-    bpy.app.handlers.depsgraph_update_post.append(workspace_handler)
-    print("[N-Panel Manager] Registering HUD drawing...")
+    workspace.register()
+    discovery.register()
+    log.debug("Registering HUD drawing...")
     drawing.register()
-    print("[N-Panel Manager] Registering floating overlay...")
+    log.debug("Registering floating overlay...")
     overlay.register()
-    print("[N-Panel Manager] Registration complete!")
+    startup_times["register"] = time.perf_counter() - start
+    log.info("Registration complete in %.1f ms", startup_times["register"] * 1000)
 
 def unregister():
+    # Gates call into this module, they must not outlive it
+    from .core import PanelManager
+    PanelManager.remove_gates()
     overlay.unregister()
     drawing.unregister()
+    usage.unregister()
+    scheduler.unregister()
+    redraw.unregister()
     
     if load_handler in bpy.app.handlers.load_post:
         bpy.app.handlers.load_post.remove(load_handler)
-    if workspace_handler in bpy.app.handlers.depsgraph_update_post:
-        bpy.app.handlers.depsgraph_update_post.remove(workspace_handler)
+    if bpy.app.timers.is_registered(_deferred_restore):
+        bpy.app.timers.unregister(_deferred_restore)
+    if bpy.app.timers.is_registered(_upgrade_prefs):
+        bpy.app.timers.unregister(_upgrade_prefs)
+    workspace.unregister()
+    discovery.unregister()
         
     ui.unregister()
     operators.unregister_classes()
     preferences.unregister()
+    snapshot.save()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+"""
+Headless benchmark suite for N-Panel Manager.
+
+Run from the addon folder:
+
+    blender --background --factory-startup --python benchmarks/run_benchmarks.py -- [options]
+
+Generates synthetic panel populations, times group apply, restore,
+group-to-group switches and scroll bursts, writes the results as JSON and
+compares them against a stored baseline. Exits with status 1 when a
+benchmark got slower than the baseline by more than the tolerance.
+
+The addon's config files (panel snapshot, user presets) go to a temporary
+folder for the run, the user's own are never touched.
+
+Options (after "--"):
+    --sizes 100,1000,10000      Panel counts to test
+    --categories 50             Number of categories per population
+    --subpanel-ratio 0.2        Share of panels that are bl_parent_id sub-panels
+    --repeats 5                 Samples per benchmark (median is reported)
+    --burst 5                   Scroll notches per burst
+    --engines RECATEGORY,POLL   Switch engines to compare
+    --output PATH               Results file (default benchmarks/results/latest.json)
+    --baseline NAME             Baseline to compare against (default "default")
+    --save-baseline             Store these results as the baseline instead
+    --tolerance 0.25            Allowed slowdown before a result is flagged
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import bpy
+import addon_utils
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import SyntheticPopulation  # noqa: E402
+
+ADDON_ID = "n_panel_manager"
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="N-Panel Manager benchmarks")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--subpanel-ratio", type=float, default=0.2)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--engines", default="RECATEGORY,POLL")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "latest.json"))
+    parser.add_argument("--baseline", default="default")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+
+def isolate_config():
+    """
+    Points Blender's user config folder at a temporary one, so the synthetic
+    panels never end up in the user's snapshot. Returns the folder, removed
+    by the caller.
+    """
+    config_dir = tempfile.mkdtemp(prefix="npanel_bench_config_")
+    # Read by Blender on every user_resource() lookup
+    os.environ["BLENDER_USER_CONFIG"] = config_dir
+    resolved = bpy.utils.user_resource('CONFIG')
+    if os.path.realpath(resolved) != os.path.realpath(config_dir):
+        shutil.rmtree(config_dir, ignore_errors=True)
+        raise RuntimeError(f"Could not isolate the config folder, Blender still uses {resolved}")
+    return config_dir
+
+
+def enable_addon():
+    """Makes the addon importable under its real name and enables it."""
+    if os.path.basename(ADDON_DIR) == ADDON_ID:
+        sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    else:
+        link_dir = tempfile.mkdtemp(prefix="npanel_bench_")
+        os.symlink(ADDON_DIR, os.path.join(link_dir, ADDON_ID), target_is_directory=True)
+        sys.path.insert(0, link_dir)
+    addon_utils.enable(ADDON_ID, default_set=True)
+    return sys.modules[ADDON_ID]
+
+
+def make_group(addon, prefs, name, categories, enabled):
+    group = prefs.groups.add()
+    group.name = name
+    addon.preferences.sync_category_table(prefs, categories)
+    addon.preferences.set_group_members(prefs, group, enabled)
+    return group
+
+
+def timed(func, repeats, setup=None):
+    samples = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def run_population(addon, args, panel_count, engine):
+    core = addon.core
+    scheduler = addon.scheduler
+    context = bpy.context
+    prefs = context.preferences.addons[ADDON_ID].preferences
+    prefs.engine = engine
+    # The engine update queues a re-apply, timers don't tick here
+    scheduler.cancel()
+
+    population = SyntheticPopulation(
+        panel_count, args.categories, subpanel_ratio=args.subpanel_ratio
+    ).register()
+    core.registry.invalidate()
+
+    cats = population.categories
+    half = set(cats[: len(cats) // 2])
+    shifted = set(cats[len(cats) // 4: len(cats) // 4 + len(cats) // 2])
+
+    prefs.groups.clear()
+    make_group(addon, prefs, "Bench A", cats, half)
+    make_group(addon, prefs, "Bench B", cats, shifted)
+    for i in range(args.burst):
+        make_group(addon, prefs, f"Bench Burst {i}", cats, set(cats[i::args.burst]))
+    addon.preferences.tag_groups_changed()
+
+    def restore():
+        core.PanelManager.restore_all(context)
+
+    def apply_a():
+        core.PanelManager.apply_group(context, "Bench A")
+
+    def scan():
+        core.registry.invalidate()
+        core.registry.ensure()
+
+    def burst():
+        # Each notch only selects, the settle timer applies the last one;
+        # timers don't tick in background mode, so flush by hand.
+        for i in range(args.burst):
+            scheduler.request_switch(2 + i)
+        if bpy.app.timers.is_registered(scheduler._flush):
+            bpy.app.timers.unregister(scheduler._flush)
+        scheduler._flush()
+
+    results = {
+        "scan": timed(scan, args.repeats),
+        "apply": timed(apply_a, args.repeats, setup=restore),
+        "restore": timed(restore, args.repeats, setup=apply_a),
+        "switch": timed(
+            lambda: core.PanelManager.apply_group(context, "Bench B"),
+            args.repeats, setup=apply_a,
+        ),
+        "scroll_burst": timed(burst, args.repeats, setup=restore),
+    }
+
+    restore()
+    core.PanelManager.remove_gates()
+    prefs.groups.clear()
+    addon.preferences.tag_groups_changed()
+    population.unregister()
+    core.registry.invalidate()
+
+    return [
+        {
+            "benchmark": name,
+            "engine": engine,
+            "panels": panel_count,
+            "categories": args.categories,
+            "subpanel_ratio": args.subpanel_ratio,
+            "median_ms": statistics.median(samples),
+            "min_ms": min(samples),
+            "samples": len(samples),
+        }
+        for name, samples in results.items()
+    ]
+
+
+def result_key(result):
+    return (result["benchmark"], result.get("engine", "RECATEGORY"), result["panels"],
+            result["categories"], result["subpanel_ratio"])
+
+
+def compare(results, baseline, tolerance):
+    """Returns the results that got slower than the baseline allows."""
+    reference = {result_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        old = reference.get(result_key(result))
+        if old is None:
+            continue
+        limit = old["median_ms"] * (1.0 + tolerance)
+        result["baseline_ms"] = old["median_ms"]
+        if result["median_ms"] > limit:
+            regressions.append(result)
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    args = parse_args()
+    addon = enable_addon()
+    # Only warnings from the addon while timing
+    addon.constants.set_log_level('WARNING')
+
+    engines = [e for e in args.engines.split(",") if e]
+    results = []
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        for engine in engines:
+            print(f"Benchmarking {size} panels with the {engine} engine...")
+            results.extend(run_population(addon, args, size, engine))
+
+    report = {
+        "addon_version": ".".join(str(v) for v in addon.bl_info["version"]),
+        "blender": bpy.app.version_string,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+    baseline_path = os.path.join(BENCH_DIR, "baselines", f"{args.baseline}.json")
+    if args.save_baseline:
+        write_json(baseline_path, report)
+        print(f"Saved baseline to {baseline_path}")
+        return 0
+
+    regressions = []
+    if os.path.exists(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    else:
+        print(f"No baseline at {baseline_path}, run with --save-baseline to create one")
+
+    write_json(args.output, report)
+
+    for r in results:
+        flag = "  REGRESSION" if r in regressions else ""
+        base = f" (baseline {r['baseline_ms']:.2f})" if "baseline_ms" in r else ""
+        print(f"{r['benchmark']:>13} {r['engine']:>10} {r['panels']:>6} panels: "
+              f"{r['median_ms']:9.2f} ms{base}{flag}")
+    print(f"Results written to {args.output}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    config_dir = isolate_config()
+    try:
+        code = main()
+    finally:
+        shutil.rmtree(config_dir, ignore_errors=True)
+    # Blender ignores the script's return value, so exit explicitly
+    sys.exit(code)
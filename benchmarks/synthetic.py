@@ -0,0 +1,67 @@
+"""
+Synthetic N-Panel populations for the N-Panel Manager benchmarks.
+
+Builds and registers throw-away VIEW_3D/UI panel classes spread over a
+configurable number of categories and fake addon modules, with a share of
+them being bl_parent_id sub-panels.
+"""
+
+import gc
+import random
+import bpy
+
+
+def _draw(self, context):
+    self.layout.label(text=self.bl_label)
+
+
+class SyntheticPopulation:
+    """A registered set of generated panels. Call unregister() when done."""
+
+    def __init__(self, panel_count, category_count, addon_count=20,
+                 subpanel_ratio=0.2, seed=0):
+        self.panel_count = panel_count
+        self.category_count = category_count
+        self.addon_count = addon_count
+        self.subpanel_ratio = subpanel_ratio
+        self.classes = []
+        self.categories = [f"Bench {i:04d}" for i in range(category_count)]
+        self._rng = random.Random(seed)
+
+    def _make_class(self, index, category, module, parent=None):
+        idname = f"BENCH_PT_panel_{index:05d}"
+        attrs = {
+            "bl_idname": idname,
+            "bl_label": f"Bench Panel {index}",
+            "bl_space_type": 'VIEW_3D',
+            "bl_region_type": 'UI',
+            "bl_category": category,
+            "draw": _draw,
+            "__module__": module,
+        }
+        if parent is not None:
+            attrs["bl_parent_id"] = parent.bl_idname
+        return type(idname, (bpy.types.Panel,), attrs)
+
+    def register(self):
+        roots = []
+        for index in range(self.panel_count):
+            module = f"bench_addon_{index % self.addon_count:03d}"
+            if roots and self._rng.random() < self.subpanel_ratio:
+                parent = self._rng.choice(roots)
+                cls = self._make_class(index, parent.bl_category, module, parent)
+            else:
+                cls = self._make_class(index, self.categories[index % self.category_count], module)
+                roots.append(cls)
+            # Parents are always created (and registered) before their children
+            bpy.utils.register_class(cls)
+            self.classes.append(cls)
+        return self
+
+    def unregister(self):
+        for cls in reversed(self.classes):
+            if 'bl_rna' in cls.__dict__:
+                bpy.utils.unregister_class(cls)
+        self.classes.clear()
+        # Drop the classes so they leave Panel.__subclasses__()
+        gc.collect()
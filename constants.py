@@ -1,4 +1,44 @@
 """N-Panel Manager constants and shared utilities."""
 
+import logging
+
 # The addon package name - use this instead of __package__ in submodules
 ADDON_ID = "n_panel_manager"
+
+# Category that filtered-out panels are moved into
+HIDDEN_CATEGORY = " Hidden"
+
+# Group index meaning "no group, show every tab"
+SHOW_ALL = -1
+
+# Editors whose sidebar (UI region) panels can be grouped, as ENUM_FLAG items
+SPACE_TYPES = (
+    ('VIEW_3D', "3D View", "3D Viewport sidebar", 'VIEW3D', 1),
+    ('IMAGE_EDITOR', "Image Editor", "Image and UV Editor sidebar", 'IMAGE', 2),
+    ('NODE_EDITOR', "Node Editor", "Shader, Geometry and Compositor node sidebar", 'NODETREE', 4),
+    ('SEQUENCE_EDITOR', "Sequencer", "Video Sequencer sidebar", 'SEQUENCE', 8),
+    ('CLIP_EDITOR', "Movie Clip", "Movie Clip Editor sidebar", 'TRACKER', 16),
+    ('TEXT_EDITOR', "Text Editor", "Text Editor sidebar", 'TEXT', 32),
+)
+SPACE_TYPE_IDS = frozenset(item[0] for item in SPACE_TYPES)
+
+# Addon-wide logger, level is set from the preferences ("OFF" silences it)
+log = logging.getLogger(ADDON_ID)
+log.propagate = False
+if not log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("[N-Panel Manager] %(levelname)s: %(message)s"))
+    log.addHandler(_handler)
+log.setLevel(logging.INFO)
+
+LOG_LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'OFF': logging.CRITICAL + 1,
+}
+
+
+def set_log_level(name):
+    log.setLevel(LOG_LEVELS.get(name, logging.INFO))
@@ -1,101 +1,731 @@
+import time
 import bpy
-from .constants import ADDON_ID
+from . import gating
+from . import redraw
+from . import snapshot
+from .constants import ADDON_ID, HIDDEN_CATEGORY, SPACE_TYPE_IDS, log
+from .metrics import metrics
+from .preferences import resolve_addons, resolve_members
+
+# Our own panels are never indexed, so they can't be hidden
+_OWN_PANELS = {"NPANEL_PT_Main"}
+
+
+def is_registered(cls):
+    """True if the class is currently registered with Blender.
+
+    Registration stores ``bl_rna`` in the class' own namespace, while
+    unregistered subclasses only inherit the one from ``bpy.types.Panel``.
+    """
+    return 'bl_rna' in cls.__dict__
+
+
+def addon_package(module):
+    """
+    Top-level package owning a module: the addon. Extensions live one level
+    deeper, under their repository ("bl_ext.user_default.hops").
+    """
+    parts = module.split(".")
+    if parts[0] == "bl_ext" and len(parts) >= 3:
+        return ".".join(parts[:3])
+    return parts[0]
+
+
+class SpaceIndex:
+    """Category and addon buckets of the sidebar panels of one editor type."""
+
+    __slots__ = ("panels", "by_orig_category", "by_category", "by_addon")
+
+    def __init__(self):
+        self.panels = []
+        self.by_orig_category = {}
+        self.by_category = {}
+        self.by_addon = {}
+
+
+class PanelRegistry:
+    """
+    Persistent index of sidebar panels of every supported editor.
+
+    Built once from a recursive walk of ``bpy.types.Panel`` (so panels that
+    derive from an intermediate base class are found too). Lookups go
+    through ensure(), which only builds the index if there is none, so they
+    are dict hits. Whether the set of registered panels changed is checked
+    by check(), which walks every Panel class and is therefore left to the
+    low-frequency discovery timer. The top-level buckets span all editors,
+    ``spaces`` holds one SpaceIndex per editor type.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.panels = []
+        self.by_orig_category = {}
+        self.by_category = {}
+        self.spaces = {}
+        self.by_module = {}
+        self.parent_of = {}
+        self.children_of = {}
+        self.depth = {}
+        self.tab_of = {}
+        self.by_addon = {}
+        self.addon_of = {}
+        self._fingerprint = None
+
+    @staticmethod
+    def _scan():
+        """
+        Walks every Panel class. Returns the registered sidebar panels and a
+        fingerprint of them: a panel an addon registers or unregisters later
+        (a "show in sidebar" toggle) changes it even though its class
+        existed all along.
+        """
+        panels = []
+        seen = set()
+        pending = list(bpy.types.Panel.__subclasses__())
+
+        while pending:
+            cls = pending.pop()
+            if cls in seen:
+                continue
+            seen.add(cls)
+            pending.extend(cls.__subclasses__())
+
+            if getattr(cls, 'bl_space_type', '') not in SPACE_TYPE_IDS or \
+               getattr(cls, 'bl_region_type', '') != 'UI':
+                continue
+            if cls.__name__ in _OWN_PANELS or not is_registered(cls):
+                continue
+            panels.append(cls)
+
+        # Re-registering a panel under another tab keeps it in the set
+        return panels, (len(seen), len(panels), hash(frozenset(panels)))
+
+    def invalidate(self):
+        """Force a rebuild on the next lookup."""
+        self._fingerprint = None
+
+    def ensure(self):
+        """Builds the index if there is none (or it was invalidated). Returns self."""
+        if self._fingerprint is None:
+            self._rebuild(*self._scan())
+        return self
+
+    def check(self):
+        """
+        Rebuilds the index if the set of registered sidebar panels changed.
+        O(all Panel classes), for the discovery timer. True if it rebuilt.
+        """
+        panels, fingerprint = self._scan()
+        if fingerprint == self._fingerprint:
+            return False
+        self._rebuild(panels, fingerprint)
+        return True
+
+    def _rebuild(self, panels, fingerprint):
+
+        by_idname = {}
+        for cls in panels:
+            # Look in the class' own namespace: a parent panel's stored
+            # category must not leak into its subclasses.
+            if '_npanel_orig_category' not in cls.__dict__:
+                cls._npanel_orig_category = snapshot.resolve(cls, getattr(cls, 'bl_category', 'Item'))
+            by_idname[getattr(cls, 'bl_idname', '') or cls.__name__] = cls
+
+        parent_of = {}
+        children_of = {}
+        for cls in panels:
+            parent = by_idname.get(getattr(cls, 'bl_parent_id', ''))
+            if parent is not None and parent is not cls:
+                parent_of[cls] = parent
+                children_of.setdefault(parent, []).append(cls)
+
+        depth = {}
+        for cls in panels:
+            # Walk up to the first ancestor with a known depth
+            chain = []
+            node = cls
+            while node not in depth and node not in chain:
+                chain.append(node)
+                node = parent_of.get(node)
+                if node is None:
+                    break
+            base = depth.get(node, -1) if node is not None else -1
+            for offset, link in enumerate(reversed(chain), 1):
+                depth[link] = base + offset
+
+        by_orig_category = {}
+        by_category = {}
+        by_module = {}
+        by_addon = {}
+        spaces = {}
+        tab_of = {}
+        addon_of = {}
+        packages = {}  # module -> addon package, most panels share a module
+        for cls in panels:
+            # Sub-panels live on their root panel's tab, so they are indexed
+            # (and therefore shown or hidden) under the root's category and
+            # addon, even when another addon contributed them.
+            root = cls
+            for _ in range(depth[cls]):
+                root = parent_of[root]
+            orig = root._npanel_orig_category
+            tab_of[cls] = orig
+            addon = packages.get(root.__module__)
+            if addon is None:
+                addon = packages[root.__module__] = addon_package(root.__module__)
+            addon_of[cls] = addon
+            current = getattr(cls, 'bl_category', 'Item')
+            space = spaces.get(cls.bl_space_type)
+            if space is None:
+                space = spaces[cls.bl_space_type] = SpaceIndex()
+            space.panels.append(cls)
+            space.by_orig_category.setdefault(orig, set()).add(cls)
+            space.by_category.setdefault(current, set()).add(cls)
+            space.by_addon.setdefault(addon, set()).add(cls)
+            by_orig_category.setdefault(orig, set()).add(cls)
+            by_category.setdefault(current, set()).add(cls)
+            by_module.setdefault(cls.__module__, set()).add(cls)
+            by_addon.setdefault(addon, set()).add(cls)
+
+        self.panels = panels
+        self.by_orig_category = by_orig_category
+        self.by_category = by_category
+        self.spaces = spaces
+        self.by_module = by_module
+        self.parent_of = parent_of
+        self.children_of = children_of
+        self.depth = depth
+        self.tab_of = tab_of
+        self.by_addon = by_addon
+        self.addon_of = addon_of
+        self._fingerprint = fingerprint
+        self.version += 1
+        snapshot.save()
+        metrics.count("scanned", len(panels))
+        log.debug("Indexed %d panels (registry version %d)", len(panels), self.version)
+
+    def descendants(self, cls):
+        """Yields all indexed sub-panels below a panel."""
+        pending = list(self.children_of.get(cls, ()))
+        while pending:
+            child = pending.pop()
+            yield child
+            pending.extend(self.children_of.get(child, ()))
+
+    def space(self, space_type):
+        """SpaceIndex of an editor type, empty if it has no sidebar panels."""
+        return self.spaces.get(space_type) or SpaceIndex()
+
+    def categories_in(self, space_types):
+        """Original categories used by panels of the given editor types."""
+        names = set()
+        for space_type in space_types:
+            names.update(self.space(space_type).by_orig_category)
+        names.discard(HIDDEN_CATEGORY)
+        return names
+
+    def addon_categories(self, addon):
+        """Original categories the panels of an addon live on."""
+        tab_of = self.tab_of
+        return {tab_of[cls] for cls in self.by_addon.get(addon, ())} - {HIDDEN_CATEGORY}
+
+    def set_category(self, cls, category):
+        """Moves a panel between current-category buckets after re-registration."""
+        current = getattr(cls, 'bl_category', 'Item')
+        space = self.spaces.get(getattr(cls, 'bl_space_type', ''))
+        for buckets in (self.by_category, space.by_category if space else None):
+            if buckets is None:
+                continue
+            bucket = buckets.get(current)
+            if bucket is not None:
+                bucket.discard(cls)
+                if not bucket:
+                    del buckets[current]
+            buckets.setdefault(category, set()).add(cls)
+        cls.bl_category = category
+
+
+registry = PanelRegistry()
+
 
 class PanelScanner:
     @staticmethod
     def get_all_n_panels():
-        """Yields all UI panel classes in VIEW_3D."""
-        for cls in bpy.types.Panel.__subclasses__():
-            if getattr(cls, 'bl_space_type', '') == 'VIEW_3D' and \
-               getattr(cls, 'bl_region_type', '') == 'UI':
-                 # Exclude our own panel to prevent hiding it
-                 if cls.__name__ == "NPANEL_PT_Main":
-                     continue
-                 yield cls
+        """Yields all sidebar panel classes of the supported editors."""
+        yield from registry.ensure().panels
 
     @staticmethod
     def get_current_categories():
         """Returns set of currently visible categories."""
-        cats = set()
-        for cls in PanelScanner.get_all_n_panels():
-            # We care about the CURRENT name
-            cat = getattr(cls, 'bl_category', 'Item')
-            cats.add(cat)
-        return sorted(list(cats))
-    
+        return sorted(registry.ensure().by_category)
+
+    @staticmethod
+    def get_original_categories():
+        """Returns sorted list of the categories panels were registered with."""
+        return sorted(c for c in registry.ensure().by_orig_category if c != HIDDEN_CATEGORY)
+
     @staticmethod
     def ensure_original_categories_stored():
-        """Iterates all panels and stores their original bl_category if not already stored."""
-        for cls in PanelScanner.get_all_n_panels():
-            if not hasattr(cls, '_npanel_orig_category'):
-                # If we are already running and they are hidden, this might be risky.
-                # But assuming this runs FIRST before any hiding, we are good.
-                # TODO: If we reload, we might lose this. 
-                # Ideally we persist this, but for now runtime is okay.
-                cls._npanel_orig_category = getattr(cls, 'bl_category', 'Item')
+        """Makes sure every indexed panel has its original bl_category stored."""
+        # Classes we meet for the first time get theirs from the snapshot,
+        # which survives reloads while their live category is " Hidden".
+        registry.ensure()
+
+
+class Selection:
+    """
+    What a group shows: panels on ``categories``, plus every panel of the
+    ``show_addons`` packages, minus every panel of the ``hide_addons``
+    packages. Hashable, the planner caches on it.
+    """
+
+    __slots__ = ("categories", "show_addons", "hide_addons", "_hash")
+
+    def __init__(self, categories, show_addons=frozenset(), hide_addons=frozenset()):
+        self.categories = frozenset(categories)
+        self.show_addons = frozenset(show_addons)
+        self.hide_addons = frozenset(hide_addons)
+        self._hash = hash((self.categories, self.show_addons, self.hide_addons))
+
+    def __eq__(self, other):
+        return (isinstance(other, Selection) and self._hash == other._hash and
+                self.categories == other.categories and
+                self.show_addons == other.show_addons and
+                self.hide_addons == other.hide_addons)
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return (f"Selection({len(self.categories)} tabs, +{sorted(self.show_addons)}, "
+                f"-{sorted(self.hide_addons)})")
+
+
+class SwitchPlan:
+    """The exact set of panels that have to move to reach a target layout."""
+
+    __slots__ = ("target", "to_hide", "to_show", "estimated_seconds")
+
+    def __init__(self, target, to_hide, to_show, estimated_seconds):
+        self.target = target
+        self.to_hide = to_hide
+        self.to_show = to_show
+        self.estimated_seconds = estimated_seconds
+
+    @property
+    def move_count(self):
+        return len(self.to_hide) + len(self.to_show)
+
+    def __repr__(self):
+        return (f"SwitchPlan({self.target!r}, hide={len(self.to_hide)}, "
+                f"show={len(self.to_show)}, ~{self.estimated_seconds * 1000:.1f} ms)")
+
+
+class SwitchPlanner:
+    """
+    Caches, per editor type and Selection, which panels a group hides, and the from->to diff between two such layouts.
+
+    Caches are dropped whenever the registry is rebuilt. The live layout of
+    each editor type is tracked in ``applied``: as long as nothing else moved
+    panels, switching between two known layouts is a dict lookup and only
+    the panels that differ get re-registered. Editors a switch doesn't
+    target are never looked at.
+    """
+
+    # Seed for the per-move cost until the first real switch is measured
+    DEFAULT_SECONDS_PER_MOVE = 0.0005
+
+    # Sentinel: layout has to be read back from the registry
+    _UNKNOWN = object()
+
+    def __init__(self):
+        self.seconds_per_move = self.DEFAULT_SECONDS_PER_MOVE
+        # Editor type -> Selection its panels are in, None = all visible.
+        # Missing editors are unknown.
+        self.applied = {}
+        self._version = -1
+        self._hidden_sets = {}
+        self._diffs = {}
+
+    def _check_version(self):
+        if self._version != registry.version:
+            self._version = registry.version
+            self._hidden_sets.clear()
+            self._diffs.clear()
+            self.applied.clear()
+
+    def is_applied(self, allowed, space_types):
+        """True if the live layout of every given editor is known to match Selection ``allowed``."""
+        registry.ensure()
+        self._check_version()
+        return all(
+            self.applied.get(space_type, self._UNKNOWN) is not self._UNKNOWN and
+            self.applied[space_type] == allowed
+            for space_type in space_types
+        )
+
+    def hidden_set(self, allowed, space_type):
+        """Frozenset of panels of one editor hidden by Selection ``allowed``."""
+        self._check_version()
+        if allowed is None:
+            return frozenset()
+        key = (space_type, allowed)
+        hidden = self._hidden_sets.get(key)
+        if hidden is None:
+            space = registry.space(space_type)
+            categories = allowed.categories
+            hidden = {
+                cls
+                for category, panels in space.by_orig_category.items()
+                if category not in categories
+                for cls in panels
+            }
+            # Addon buckets hold whole panel trees, so touching them costs
+            # only that addon's panels and never splits a parent from its children
+            for addon in allowed.show_addons:
+                hidden.difference_update(space.by_addon.get(addon, ()))
+            for addon in allowed.hide_addons:
+                hidden.update(space.by_addon.get(addon, ()))
+            hidden = frozenset(hidden)
+            self._hidden_sets[key] = hidden
+        return hidden
+
+    def _space_diff(self, allowed, space_type):
+        applied = self.applied.get(space_type, self._UNKNOWN)
+        cache_key = (space_type, applied, allowed)
+        diff = self._diffs.get(cache_key) if applied is not self._UNKNOWN else None
+        if diff is None:
+            current = registry.space(space_type).by_category.get(HIDDEN_CATEGORY, set())
+            wanted = self.hidden_set(allowed, space_type)
+            to_show = frozenset(
+                cls for cls in current - wanted
+                # Panels whose real tab was never recorded have nowhere to go
+                if cls._npanel_orig_category != HIDDEN_CATEGORY
+            )
+            diff = (frozenset(wanted - current), to_show)
+            metrics.count("scanned", len(current) + len(wanted))
+            if applied is not self._UNKNOWN:
+                self._diffs[cache_key] = diff
+        return diff
+
+    def plan(self, target, allowed, space_types):
+        """
+        Builds the plan to bring the given editors from their live layout to
+        Selection ``allowed`` (None restores everything). ``target`` is only a label.
+        """
+        registry.ensure()
+        self._check_version()
+
+        to_hide = frozenset()
+        to_show = frozenset()
+        for space_type in space_types:
+            hide, show = self._space_diff(allowed, space_type)
+            to_hide |= hide
+            to_show |= show
+
+        estimate = (len(to_hide) + len(to_show)) * self.seconds_per_move
+        return SwitchPlan(target, to_hide, to_show, estimate)
+
+    def record(self, allowed, space_types, moved, seconds, complete):
+        """Stores the outcome of executing a plan."""
+        if moved:
+            # Exponential moving average so the estimate follows the machine
+            sample = seconds / moved
+            self.seconds_per_move += (sample - self.seconds_per_move) * 0.3
+        for space_type in space_types:
+            if complete:
+                self.applied[space_type] = allowed
+            else:
+                self.applied.pop(space_type, None)
+
+
+planner = SwitchPlanner()
+
+
+class RegistrationBatch:
+    """
+    Re-registers a set of panels under new categories in one pass.
+
+    Blender orphans sub-panels whose parent is unregistered and refuses to
+    register a sub-panel before its parent, so the batch pulls in every
+    registered descendant of a moving panel, unregisters child-first and
+    registers parent-first. Children always land on their parent's side:
+    hidden with it, or back on their own original tab.
+    """
+
+    def __init__(self, moves):
+        # cls -> target category
+        self.moves = dict(moves)
+        self.moved = 0
+        self.failed = 0
+
+    def _expand(self):
+        for cls in list(self.moves):
+            for child in registry.descendants(cls):
+                if child in self.moves:
+                    continue
+                parent_target = self.moves[registry.parent_of[child]]
+                if parent_target == HIDDEN_CATEGORY:
+                    self.moves[child] = HIDDEN_CATEGORY
+                else:
+                    self.moves[child] = child._npanel_orig_category
+
+    def run(self):
+        """
+        Executes the batch as a transaction. Returns the number of panels moved.
+
+        A panel that won't unregister simply stays where it is. A panel that
+        was unregistered but won't register again aborts the batch: every
+        panel of the batch goes back to the tab it had before.
+        """
+        self._expand()
+        depth = registry.depth
+        order = sorted(self.moves, key=lambda c: depth.get(c, 0))
+        if not order:
+            return 0
+        previous = {cls: getattr(cls, 'bl_category', 'Item') for cls in order}
+
+        unregistered = set()
+        registered = set()
+        try:
+            with metrics.phase("unregister"):
+                for cls in reversed(order):
+                    if not is_registered(cls):
+                        # Owner was unregistered behind our back, index is stale
+                        registry.invalidate()
+                        continue
+                    try:
+                        bpy.utils.unregister_class(cls)
+                        unregistered.add(cls)
+                    except Exception as e:
+                        log.warning("Failed to move %s: %s", cls.__name__, e)
+
+            with metrics.phase("register"):
+                for cls in order:
+                    if cls not in unregistered:
+                        self.failed += 1
+                        continue
+                    target = self.moves[cls]
+                    changed = previous[cls] != target
+                    registry.set_category(cls, target)
+                    bpy.utils.register_class(cls)
+                    registered.add(cls)
+                    if changed:
+                        self.moved += 1
+        except Exception as e:
+            log.warning("Switch aborted, rolling back %d panels: %s", len(unregistered), e)
+            self._rollback(order, previous, unregistered, registered)
+
+        metrics.count("moved", self.moved)
+        metrics.count("failed", self.failed)
+        return self.moved
+
+    def _rollback(self, order, previous, unregistered, registered):
+        """Puts every panel the batch touched back on its previous tab."""
+        with metrics.phase("rollback"):
+            detached = set(unregistered - registered)
+            for cls in reversed(order):
+                if cls not in registered:
+                    continue
+                try:
+                    bpy.utils.unregister_class(cls)
+                    detached.add(cls)
+                except Exception as e:
+                    log.warning("Rollback could not unregister %s: %s", cls.__name__, e)
+
+            restored = 0
+            for cls in order:
+                if cls not in detached:
+                    continue
+                registry.set_category(cls, previous[cls])
+                try:
+                    bpy.utils.register_class(cls)
+                    restored += 1
+                except Exception as e:
+                    # Left unregistered, the next scan drops it from the index
+                    log.error("Rollback could not restore %s: %s", cls.__name__, e)
+                    registry.invalidate()
+
+        self.failed = len(order) - restored
+        self.moved = 0
+        metrics.count("rolled_back", restored)
+
 
 class PanelManager:
+    @staticmethod
+    def _find_group(context, group_name):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        return next((g for g in prefs.groups if g.name == group_name), None)
+
+    @staticmethod
+    def _selection(context, group):
+        """Selection a group shows."""
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        # Includes flattened and memoized, a composite group plans like a flat one.
+        # Rules match against the index, so it has to be current first.
+        registry.ensure()
+        show_addons, hide_addons = resolve_addons(prefs, group)
+        return Selection(resolve_members(prefs, group), show_addons, hide_addons)
+
+    @staticmethod
+    def _space_types(group):
+        """Editor types a group switches, the rest are left alone."""
+        return frozenset(group.space_types)
+
+    @staticmethod
+    def plan_group(context, group_name):
+        """
+        Dry run: returns the SwitchPlan apply_group would execute, or None if
+        the group doesn't exist. Nothing is moved.
+        """
+        group = PanelManager._find_group(context, group_name)
+        if not group:
+            return None
+        return planner.plan(group_name, PanelManager._selection(context, group),
+                            PanelManager._space_types(group))
+
+    @staticmethod
+    def plan_restore(context):
+        """Dry run of restore_all."""
+        return planner.plan(None, None, SPACE_TYPE_IDS)
+
+    @staticmethod
+    def _execute(plan, allowed, space_types):
+        """Moves the panels of a plan. Returns number of panels moved."""
+        start = time.perf_counter()
+        moves = {cls: HIDDEN_CATEGORY for cls in plan.to_hide}
+        moves.update((cls, cls._npanel_orig_category) for cls in plan.to_show)
+        batch = RegistrationBatch(moves)
+        moved = batch.run()
+        if moved or batch.failed:
+            redraw.request_sidebars(space_types)
+        planner.record(allowed, space_types, moved, time.perf_counter() - start,
+                       complete=not batch.failed)
+        return moved
+
+    @staticmethod
+    def _engine():
+        try:
+            return bpy.context.preferences.addons[ADDON_ID].preferences.engine
+        except (AttributeError, KeyError):
+            return 'RECATEGORY'
+
+    @staticmethod
+    def _reregister(panels):
+        """Re-registers panels in place, so Blender re-reads their functions."""
+        panels = [cls for cls in panels if is_registered(cls)]
+        if panels:
+            RegistrationBatch({cls: getattr(cls, 'bl_category', 'Item') for cls in panels}).run()
+
+    @staticmethod
+    def _prepare_gates():
+        """Gates new panels, once; panels still on the hidden tab go home first."""
+        registry.ensure()
+        if registry.by_category.get(HIDDEN_CATEGORY):
+            # Left over from the re-category engine
+            plan = planner.plan("Show All", None, SPACE_TYPE_IDS)
+            PanelManager._execute(plan, None, SPACE_TYPE_IDS)
+        PanelManager._reregister(gating.install(registry.panels, registry.version))
+
+    @staticmethod
+    def _gate(allowed, space_types):
+        """
+        Poll-gating engine: hides panels through their poll. A switch is a
+        table update per editor plus a sidebar redraw, nothing is re-registered.
+        """
+        with metrics.phase("scan"):
+            PanelManager._prepare_gates()
+            changed = 0
+            for space_type in space_types:
+                changed += gating.set_hidden(space_type, planner.hidden_set(allowed, space_type))
+        metrics.count("moved", changed)
+        if changed:
+            redraw.request_sidebars(space_types)
+        return changed
+
+    @staticmethod
+    def apply_area(context, area, group_name):
+        """
+        Per-area groups: shows group ``group_name`` (None = all tabs) in one
+        area only, through the poll gates. Nothing is re-registered once the
+        gates are in place.
+        """
+        allowed = None
+        if group_name is not None:
+            group = PanelManager._find_group(context, group_name)
+            if not group:
+                log.warning("Group %s not found", group_name)
+                return None
+            if area.type not in PanelManager._space_types(group):
+                # Not an editor this group filters: follow the editor-wide layout
+                gating.clear_areas([area.as_pointer()])
+                redraw.request_region(area.as_pointer(), 'UI')
+                return 0
+            allowed = PanelManager._selection(context, group)
+
+        with metrics.switch(f"{group_name or 'Show All'} (area)"):
+            with metrics.phase("scan"):
+                PanelManager._prepare_gates()
+                changed = gating.set_area_hidden(area.as_pointer(), planner.hidden_set(allowed, area.type))
+            metrics.count("moved", changed)
+        if changed:
+            redraw.request_region(area.as_pointer(), 'UI')
+        return changed
+
+    @staticmethod
+    def remove_gates():
+        """Takes the poll-gating engine off every panel, they all show again."""
+        if gating.is_installed():
+            PanelManager._reregister(gating.uninstall())
+            redraw.request_sidebars(SPACE_TYPE_IDS)
+
+    @staticmethod
+    def set_engine(engine):
+        """
+        Tears down what the other engine left behind. The caller re-applies
+        the selected group afterwards.
+        """
+        if engine != 'POLL':
+            PanelManager.remove_gates()
+        log.info("Switch engine: %s", engine)
+
+    @staticmethod
+    def _switch(label, allowed, space_types):
+        """
+        Brings the live layout of the given editors to ``allowed``. Returns
+        the number of panels moved, or None when the layout already matched.
+        """
+        with metrics.switch(label):
+            if PanelManager._engine() == 'POLL':
+                return PanelManager._gate(allowed, space_types)
+            with metrics.phase("scan"):
+                if planner.is_applied(allowed, space_types):
+                    # Same group re-requested (file load, workspace link)
+                    return None
+                plan = planner.plan(label, allowed, space_types)
+            return PanelManager._execute(plan, allowed, space_types)
+
     @staticmethod
     def apply_group(context, group_name):
         """
-        Enables only categories in the group. 
+        Enables only categories and addons in the group.
         Everything else moves to '_Hidden_'.
         """
-        PanelScanner.ensure_original_categories_stored()
-        
-        prefs = context.preferences.addons[ADDON_ID].preferences
-        group = next((g for g in prefs.groups if g.name == group_name), None)
-        
+        group = PanelManager._find_group(context, group_name)
+
         if not group:
-            print(f"Group {group_name} not found")
+            log.warning("Group %s not found", group_name)
             return
 
-        # Get allowed categories logic
-        # 'categories' collection in group defines what is allowed.
-        # But wait, we need to know what constitutes "Allowed".
-        # Let's say we rely on the implementation where we add strings to the Group.
-        allowed_cats = {c.name for c in group.categories if c.enabled}
-
-        count_moved = 0
-        
-        for cls in PanelScanner.get_all_n_panels():
-            orig = getattr(cls, '_npanel_orig_category', getattr(cls, 'bl_category', 'Item'))
-            
-            # Logic: Is this category in our allowed list?
-            should_show = (orig in allowed_cats)
-            
-            target_cat = orig if should_show else " Hidden"
-            
-            current_cat = getattr(cls, 'bl_category', 'Item')
-            
-            if current_cat != target_cat:
-                # We need to move it
-                try:
-                    bpy.utils.unregister_class(cls)
-                    cls.bl_category = target_cat
-                    bpy.utils.register_class(cls)
-                    count_moved += 1
-                except Exception as e:
-                    print(f"Failed to move {cls.__name__}: {e}")
-        
-        print(f"PanelManager: Processed panels. Moved {count_moved} panels.")
-        
+        allowed_cats = PanelManager._selection(context, group)
+        space_types = PanelManager._space_types(group)
+        count_moved = PanelManager._switch(group_name, allowed_cats, space_types)
+        if count_moved is not None:
+            log.info("Applied group '%s', moved %d panels", group_name, count_moved)
+
     @staticmethod
     def restore_all(context):
         """Restores all panels to original categories."""
-        PanelScanner.ensure_original_categories_stored()
-        
-        count = 0
-        for cls in PanelScanner.get_all_n_panels():
-            orig = getattr(cls, '_npanel_orig_category', None)
-            if orig:
-                current = getattr(cls, 'bl_category', 'Item')
-                if current != orig:
-                    try:
-                        bpy.utils.unregister_class(cls)
-                        cls.bl_category = orig
-                        bpy.utils.register_class(cls)
-                        count += 1
-                    except:
-                        pass
-        print(f"PanelManager: Restored {count} panels.")
+        count = PanelManager._switch("Show All", None, SPACE_TYPE_IDS)
+        if count is not None:
+            log.info("Restored %d panels", count)
@@ -0,0 +1,99 @@
+"""
+Automatic category discovery for N-Panel Manager.
+
+A low-frequency timer checks the panel registry's fingerprint, the only
+place the set of registered panels is walked. Only when it changed (addon
+installed, enabled or disabled, a panel toggled into the sidebar) is the
+index rebuilt and the category delta applied to the shared category table:
+new tabs are added, vanished ones are marked unavailable. Groups store only
+their members, so they never need a manual refresh.
+"""
+
+import bpy
+from .constants import ADDON_ID, HIDDEN_CATEGORY, log
+from .core import registry
+from .preferences import intern_category
+
+# Seconds between fingerprint checks
+POLL_INTERVAL = 2.0
+
+_synced_version = None
+_known = None  # Categories the table was last synced with, None = full sync
+
+
+def get_prefs():
+    try:
+        return bpy.context.preferences.addons[ADDON_ID].preferences
+    except (AttributeError, KeyError):
+        return None
+
+
+def _set_available(prefs, name, available):
+    entry = prefs.category_table[intern_category(prefs, name)]
+    if entry.available != available:
+        entry.available = available
+
+
+def sync(force=False):
+    """
+    Applies the category delta since the last sync. ``force`` rebuilds the
+    registry and re-checks every table entry.
+    """
+    global _synced_version, _known
+
+    prefs = get_prefs()
+    if not prefs:
+        return
+
+    if force:
+        registry.invalidate()
+        _known = None
+        registry.ensure()
+    else:
+        registry.check()
+    if not force and registry.version == _synced_version:
+        return
+
+    current = set(registry.by_orig_category)
+    current.discard(HIDDEN_CATEGORY)
+
+    if _known is None:
+        for name in current:
+            _set_available(prefs, name, True)
+        for entry in prefs.category_table:
+            if entry.name not in current and entry.available:
+                entry.available = False
+        log.debug("Category table synced, %d tabs available", len(current))
+    else:
+        added = current - _known
+        removed = _known - current
+        for name in added:
+            _set_available(prefs, name, True)
+        for name in removed:
+            _set_available(prefs, name, False)
+        if added or removed:
+            log.info("Discovered %d new tabs, %d tabs vanished", len(added), len(removed))
+
+    _known = current
+    _synced_version = registry.version
+
+
+def _poll():
+    try:
+        sync()
+    except Exception as e:
+        log.error("Category discovery failed: %s", e)
+    return POLL_INTERVAL
+
+
+def register():
+    global _synced_version, _known
+    _synced_version = None
+    _known = None
+    if not bpy.app.timers.is_registered(_poll):
+        bpy.app.timers.register(_poll, first_interval=POLL_INTERVAL, persistent=True)
+
+
+def unregister():
+    if bpy.app.timers.is_registered(_poll):
+        bpy.app.timers.unregister(_poll)
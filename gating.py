@@ -0,0 +1,166 @@
+"""
+Poll-gating visibility engine for N-Panel Manager.
+
+Instead of re-registering panels under a hidden tab, every indexed panel gets
+its ``poll`` wrapped once by a gate that first checks a per-editor table of
+hidden panels. A switch then only swaps the table and redraws the sidebars;
+Blender drops the tabs of panels whose poll fails on its own.
+
+Blender only calls ``poll`` on panels that had one when they were registered,
+so panels without a poll need a single re-registration to pick up the gate
+(and another one when the gate is removed). The caller does that, see
+install() and uninstall().
+
+With per-area groups an area can carry its own table, looked up by area
+pointer while the gate runs, so each viewport can show a different group.
+"""
+
+import bpy
+
+_EMPTY = frozenset()
+_MISSING = object()
+
+_hidden = {}              # editor type -> frozenset of hidden panel classes
+_area_hidden = {}         # area pointer -> frozenset, overrides _hidden in that area
+_gated = set()            # classes carrying a gate installed by this session
+_installed_version = None
+
+
+def _is_gate(poll):
+    return getattr(getattr(poll, '__func__', None), '_npanel_gate', False)
+
+
+def _original_poll(cls):
+    """
+    The poll a panel resolves to without gates, looked up through the MRO
+    like attribute access does. A gate found on the way (ours, or one left
+    by an earlier load of the addon) is unwrapped. None if there is none.
+    """
+    for klass in cls.__mro__:
+        if klass is bpy.types.Panel:
+            break
+        poll = klass.__dict__.get('poll')
+        if poll is None:
+            continue
+        if _is_gate(poll):
+            return poll.__func__._npanel_original
+        return poll
+    return None
+
+
+def _hidden_for(cls, context):
+    if _area_hidden:
+        # Per-area groups: the area being drawn may have its own table
+        area = context.area
+        if area is not None:
+            hidden = _area_hidden.get(area.as_pointer())
+            if hidden is not None:
+                return hidden
+    return _hidden.get(cls.bl_space_type, _EMPTY)
+
+
+def _make_gate(original, own, added):
+    if original is None:
+        def poll(cls, context):
+            return cls not in _hidden_for(cls, context)
+    else:
+        def poll(cls, context):
+            if cls in _hidden_for(cls, context):
+                return False
+            return original.__get__(cls, cls)(context)
+    poll._npanel_gate = True
+    poll._npanel_original = original   # what the gate falls through to
+    poll._npanel_own = own             # the class' own 'poll' before gating
+    poll._npanel_added = added         # True if Blender only knows the poll through us
+    return classmethod(poll)
+
+
+def install(panels, version):
+    """
+    Gates every panel not gated yet. ``version`` is the registry version the
+    panel list belongs to, an unchanged version returns right away.
+    Returns the panels that must be re-registered for the gate to be seen.
+    """
+    global _installed_version
+
+    if version == _installed_version:
+        return []
+    needs_register = []
+    for cls in panels:
+        if cls in _gated:
+            continue
+        own = cls.__dict__.get('poll', _MISSING)
+        if own is not _MISSING and _is_gate(own):
+            # Left by an earlier load of the addon, Blender already calls it
+            info = own.__func__
+            own, added = info._npanel_own, info._npanel_added
+        else:
+            added = _original_poll(cls) is None
+            if added:
+                needs_register.append(cls)
+        cls.poll = _make_gate(_original_poll(cls), own, added)
+        _gated.add(cls)
+    _installed_version = version
+    return needs_register
+
+
+def uninstall():
+    """
+    Puts every panel's own poll back and clears the table. Returns the
+    panels whose poll only existed through the gate; they must be
+    re-registered so Blender stops calling it.
+    """
+    global _installed_version
+
+    needs_register = []
+    for cls in _gated:
+        gate = cls.__dict__.get('poll')
+        if gate is None or not _is_gate(gate):
+            continue
+        info = gate.__func__
+        if info._npanel_own is _MISSING:
+            del cls.poll
+        else:
+            cls.poll = info._npanel_own
+        if info._npanel_added:
+            needs_register.append(cls)
+    _gated.clear()
+    _hidden.clear()
+    _area_hidden.clear()
+    _installed_version = None
+    return needs_register
+
+
+def is_installed():
+    return bool(_gated)
+
+
+def set_hidden(space_type, hidden):
+    """Replaces the hidden panels of one editor type. Returns how many changed."""
+    old = _hidden.get(space_type, _EMPTY)
+    if hidden:
+        _hidden[space_type] = hidden
+    else:
+        _hidden.pop(space_type, None)
+    return len(old ^ hidden)
+
+
+def set_area_hidden(pointer, hidden):
+    """Gives one area its own hidden panels. Returns how many changed there."""
+    old = _area_hidden.get(pointer)
+    _area_hidden[pointer] = hidden
+    return len(hidden) if old is None else len(old ^ hidden)
+
+
+def clear_areas(pointers=None):
+    """Drops the tables of the given areas (all if None), they follow the editor's again."""
+    if pointers is None:
+        _area_hidden.clear()
+    else:
+        for pointer in pointers:
+            _area_hidden.pop(pointer, None)
+
+
+def area_pointers():
+    return _area_hidden.keys()
+
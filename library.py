@@ -0,0 +1,322 @@
+"""
+Group library files for N-Panel Manager.
+
+Format 2.0 is JSON Lines, optionally gzip-compressed: a header line, then one
+line per group, so big shared libraries are read record by record. Format 1.0
+(a single JSON document) is still read.
+
+    {"format": "n_panel_manager.groups", "version": "2.0", "count": 2}
+    {"name": "Modeling", "workspace_name": "Modeling", "categories": ["Edit", "HardOps"], "space_types": ["VIEW_3D"]}
+    {"name": "Shading", "workspace_name": "", "categories": ["Node Wrangler"], "space_types": ["NODE_EDITOR"]}
+
+Imports deduplicate by a content hash of the membership set (own tabs,
+included groups, rules and addons) and the editors a group filters, not by name. Included groups are referenced by name, so a
+group renamed on import takes its references in the same file along.
+"""
+
+import gzip
+import hashlib
+import json
+from .preferences import (
+    group_members,
+    set_group_members,
+    sync_category_table,
+    tag_groups_changed,
+)
+from .constants import SHOW_ALL, SPACE_TYPE_IDS, log
+from .rules import RULE_KINDS
+
+FORMAT_ID = "n_panel_manager.groups"
+LIBRARY_VERSION = "2.0"
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+_RULE_KIND_IDS = {item[0] for item in RULE_KINDS}
+
+MERGE_STRATEGIES = [
+    ('SKIP', "Skip Duplicates", "Add new groups, skip groups whose tabs match an existing group"),
+    ('UNION', "Union", "Like Skip, but a group with an existing name adds its tabs to that group"),
+    ('REPLACE', "Replace All", "Remove all existing groups first"),
+]
+
+
+def membership_hash(categories, includes=(), rules=(), addons=(), space_types=()):
+    """
+    Content hash of a membership set and the editors it filters, independent
+    of order and group name.
+    """
+    text = "\n".join(sorted(categories))
+    if space_types:
+        text += "\n|editors\n" + "\n".join(sorted(space_types))
+    if includes:
+        text += "\n|\n" + "\n".join(sorted(f"{mode}:{name}" for mode, name in includes))
+    if rules:
+        text += "\n|rules\n" + "\n".join(sorted(f"{mode}:{kind}:{pattern}" for mode, kind, pattern in rules))
+    if addons:
+        text += "\n|addons\n" + "\n".join(sorted(f"{mode}:{module}" for mode, module in addons))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def _group_includes(group):
+    return tuple((include.mode, include.group_name) for include in group.includes if include.group_name)
+
+
+def _group_rules(group):
+    return tuple((rule.mode, rule.kind, rule.pattern) for rule in group.rules if rule.pattern)
+
+
+def _group_addons(group):
+    return tuple((entry.mode, entry.module) for entry in group.addons if entry.module)
+
+
+class GroupRecord:
+    """One group as stored in a library file."""
+
+    __slots__ = ("name", "workspace_name", "categories", "space_types", "includes", "rules", "addons")
+
+    def __init__(self, name, workspace_name, categories, space_types=('VIEW_3D',), includes=(),
+                 rules=(), addons=()):
+        self.name = name
+        self.workspace_name = workspace_name
+        self.categories = frozenset(categories)
+        # Unknown editors (newer file) are dropped, 1.0 files are 3D View only
+        self.space_types = frozenset(space_types) & SPACE_TYPE_IDS
+        # (mode, group name) pairs
+        self.includes = tuple(includes)
+        # (mode, kind, pattern) triples
+        self.rules = tuple(rules)
+        # (mode, addon package) pairs
+        self.addons = tuple(addons)
+
+    @property
+    def content_hash(self):
+        return membership_hash(self.categories, self.includes, self.rules, self.addons,
+                               self.space_types)
+
+    def to_json(self):
+        return json.dumps({
+            "name": self.name,
+            "workspace_name": self.workspace_name,
+            "categories": sorted(self.categories),
+            "space_types": sorted(self.space_types),
+            "includes": [{"mode": mode, "group": name} for mode, name in self.includes],
+            "rules": [{"mode": mode, "kind": kind, "pattern": pattern} for mode, kind, pattern in self.rules],
+            "addons": [{"mode": mode, "module": module} for mode, module in self.addons],
+        }, ensure_ascii=False)
+
+
+def _open_text(filepath, mode):
+    if 'w' in mode:
+        opener = gzip.open if filepath.endswith('.gz') else open
+        return opener(filepath, mode + 't', encoding='utf-8')
+    with open(filepath, 'rb') as f:
+        compressed = f.read(2) == _GZIP_MAGIC
+    return (gzip.open if compressed else open)(filepath, mode + 't', encoding='utf-8')
+
+
+def _list_field(data, key, default=()):
+    """A list field of a record, ValueError if it holds anything else."""
+    value = data.get(key, default)
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f'"{key}" is not a list')
+    return value
+
+
+def _record_from_v2(data):
+    names = [c for c in _list_field(data, "categories") if isinstance(c, str) and c]
+    space_types = [s for s in _list_field(data, "space_types", ['VIEW_3D']) if isinstance(s, str)]
+    includes = [
+        ('EXCLUDE' if inc.get("mode") == 'EXCLUDE' else 'UNION', inc["group"])
+        for inc in _list_field(data, "includes")
+        if isinstance(inc, dict) and isinstance(inc.get("group"), str)
+    ]
+    rules = [
+        ('EXCLUDE' if rule.get("mode") == 'EXCLUDE' else 'UNION', rule["kind"], rule["pattern"])
+        for rule in _list_field(data, "rules")
+        if isinstance(rule, dict) and rule.get("kind") in _RULE_KIND_IDS
+        and isinstance(rule.get("pattern"), str) and rule["pattern"]
+    ]
+    addons = [
+        ('EXCLUDE' if entry.get("mode") == 'EXCLUDE' else 'UNION', entry["module"])
+        for entry in _list_field(data, "addons")
+        if isinstance(entry, dict) and isinstance(entry.get("module"), str) and entry["module"]
+    ]
+    return GroupRecord(data.get("name") or "Imported Group", data.get("workspace_name", ""),
+                       names, space_types, includes, rules, addons)
+
+
+def _record_from_v1(data):
+    names = [
+        c["name"] for c in _list_field(data, "categories")
+        if isinstance(c, dict) and isinstance(c.get("name"), str) and c["name"] and c.get("enabled", False)
+    ]
+    return GroupRecord(data.get("name") or "Imported Group", data.get("workspace_name", ""), names)
+
+
+def read_library(filepath):
+    """
+    Yields a GroupRecord per group in a 1.0 or 2.0 library file, gzip or not.
+    Raises ValueError for files that are neither.
+    """
+    with _open_text(filepath, 'r') as f:
+        first = f.readline()
+        try:
+            header = json.loads(first)
+        except ValueError:
+            header = None
+
+        if isinstance(header, dict) and header.get("format") == FORMAT_ID:
+            if str(header.get("version", "")).split(".")[0] != LIBRARY_VERSION.split(".")[0]:
+                raise ValueError(f"Unsupported library version {header.get('version')}")
+            for line_no, line in enumerate(f, 2):
+                if not line.strip():
+                    continue
+                try:
+                    yield _record_from_v2(json.loads(line))
+                except (ValueError, AttributeError) as e:
+                    log.warning("Skipping bad record on line %d: %s", line_no, e)
+            return
+
+        # 1.0: one JSON document, possibly spread over many lines
+        document = header if isinstance(header, dict) else json.loads(first + f.read())
+
+    if not isinstance(document, dict) or "groups" not in document:
+        raise ValueError("Invalid file format")
+    for number, data in enumerate(document["groups"], 1):
+        try:
+            yield _record_from_v1(data)
+        except (ValueError, AttributeError) as e:
+            log.warning("Skipping bad group %d: %s", number, e)
+
+
+def write_library(filepath, records, count):
+    """Writes records as a 2.0 library, gzip-compressed if the path ends in .gz."""
+    with _open_text(filepath, 'w') as f:
+        f.write(json.dumps({"format": FORMAT_ID, "version": LIBRARY_VERSION, "count": count}))
+        f.write("\n")
+        for record in records:
+            f.write(record.to_json())
+            f.write("\n")
+
+
+def export_groups(prefs, filepath):
+    """Writes every group to a 2.0 library. Returns the number of groups."""
+    records = (
+        GroupRecord(group.name, group.workspace_name, group_members(prefs, group),
+                    group.space_types, _group_includes(group), _group_rules(group),
+                    _group_addons(group))
+        for group in prefs.groups
+    )
+    write_library(filepath, records, len(prefs.groups))
+    return len(prefs.groups)
+
+
+def _unique_name(name, taken):
+    if name not in taken:
+        return name
+    n = 1
+    while f"{name}.{n:03d}" in taken:
+        n += 1
+    return f"{name}.{n:03d}"
+
+
+def import_groups(prefs, filepath, strategy='SKIP'):
+    """
+    Reads a library file into the preferences. The whole file is read and
+    validated before any group is touched, a bad file changes nothing.
+    Returns (added, merged, skipped) group counts.
+    """
+    records = list(read_library(filepath))
+
+    if strategy == 'REPLACE':
+        prefs.groups.clear()
+        # The selection pointed into the old list
+        prefs.active_group_index = SHOW_ALL
+        prefs.is_filtering = False
+        tag_groups_changed()
+
+    by_name = {group.name: group for group in prefs.groups}
+    known_hashes = {
+        membership_hash(group_members(prefs, group), _group_includes(group), _group_rules(group),
+                        _group_addons(group), group.space_types)
+        for group in prefs.groups
+    }
+    renamed = {}  # name in the file -> name it got here
+
+    new_records = []
+    merged = skipped = 0
+    for record in records:
+        content_hash = record.content_hash
+        if content_hash in known_hashes:
+            skipped += 1
+            continue
+
+        existing = by_name.get(record.name) if strategy == 'UNION' else None
+        if existing is not None:
+            members = group_members(prefs, existing) | record.categories
+            set_group_members(prefs, existing, members)
+            existing.space_types = set(existing.space_types) | record.space_types
+            have = set(_group_includes(existing))
+            for mode, name in record.includes:
+                if (mode, name) not in have:
+                    include = existing.includes.add()
+                    include.group_name = name
+                    include.mode = mode
+            have_rules = set(_group_rules(existing))
+            for mode, kind, pattern in record.rules:
+                if (mode, kind, pattern) not in have_rules:
+                    rule = existing.rules.add()
+                    rule.kind = kind
+                    rule.pattern = pattern
+                    rule.mode = mode
+            have_addons = {module for _, module in _group_addons(existing)}
+            for mode, module in record.addons:
+                if module not in have_addons:
+                    entry = existing.addons.add()
+                    entry.module = module
+                    entry.mode = mode
+            known_hashes.add(membership_hash(members, _group_includes(existing), _group_rules(existing),
+                                             _group_addons(existing), existing.space_types))
+            merged += 1
+            continue
+
+        known_hashes.add(content_hash)
+        original_name = record.name
+        record.name = _unique_name(record.name, by_name)
+        if record.name != original_name:
+            renamed[original_name] = record.name
+        by_name[record.name] = None  # reserved, created below
+        new_records.append(record)
+
+    # Intern every category once, then create the groups in one go
+    all_names = set()
+    for record in new_records:
+        all_names |= record.categories
+    sync_category_table(prefs, sorted(all_names))
+
+    first = len(prefs.groups)
+    for _ in new_records:
+        prefs.groups.add()
+    for group, record in zip(prefs.groups[first:], new_records):
+        group.name = record.name
+        group.workspace_name = record.workspace_name
+        group.space_types = set(record.space_types)
+        set_group_members(prefs, group, record.categories)
+        for mode, name in record.includes:
+            include = group.includes.add()
+            include.group_name = renamed.get(name, name)
+            include.mode = mode
+        for mode, kind, pattern in record.rules:
+            rule = group.rules.add()
+            rule.kind = kind
+            rule.pattern = pattern
+            rule.mode = mode
+        for mode, module in record.addons:
+            entry = group.addons.add()
+            entry.module = module
+            entry.mode = mode
+
+    tag_groups_changed()
+    log.info("Imported %d groups (%d merged, %d duplicates skipped) from %s",
+             len(new_records), merged, skipped, filepath)
+    return len(new_records), merged, skipped
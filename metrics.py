@@ -0,0 +1,172 @@
+"""
+Switch instrumentation for N-Panel Manager.
+
+Counts panels scanned, moved and failed per switch, keeps wall-time
+histograms for the scan / unregister / register phases, records a bounded
+timeline that can be exported as Chrome trace-event JSON (chrome://tracing,
+Perfetto) and can capture a cProfile of a single switch.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+from collections import deque
+from contextlib import contextmanager
+from .constants import log
+
+PHASES = ("scan", "unregister", "register", "rollback", "total")
+
+# Wall-clock cost of the addon at startup, in seconds
+startup_times = {"register": None, "first_restore": None}
+
+
+class Histogram:
+    """Wall-time histogram with power-of-two millisecond buckets."""
+
+    # Upper bounds in ms; the last bucket catches everything above
+    BOUNDS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        ms = seconds * 1000.0
+        for i, bound in enumerate(self.BOUNDS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        """Upper bound (ms) of the bucket holding the given fraction of samples."""
+        if not self.count:
+            return 0.0
+        threshold = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= threshold:
+                return self.BOUNDS[i] if i < len(self.BOUNDS) else self.max
+        return self.max
+
+
+class SwitchMetrics:
+    """Collects counters, histograms and trace events for every switch."""
+
+    MAX_TRACE_EVENTS = 5000
+
+    def __init__(self):
+        self.reset()
+        self.profile_next = False
+        self.last_profile = ""
+
+    def reset(self):
+        self.switches = 0
+        self.totals = {"scanned": 0, "moved": 0, "failed": 0, "rolled_back": 0}
+        self.last = {}
+        self.histograms = {name: Histogram() for name in PHASES}
+        self.trace = deque(maxlen=self.MAX_TRACE_EVENTS)
+        self._current = None
+        self._origin = time.perf_counter()
+
+    def _event(self, name, start, duration, args=None):
+        event = {
+            "name": name,
+            "cat": "npanel",
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": 1,
+            "tid": 1,
+        }
+        if args:
+            event["args"] = args
+        self.trace.append(event)
+
+    def count(self, name, amount=1):
+        """Adds to a counter of the switch in progress (ignored outside one)."""
+        if self._current is not None:
+            self._current[name] += amount
+
+    @contextmanager
+    def phase(self, name):
+        """Times one phase of the switch in progress."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.histograms[name].add(duration)
+            self._event(name, start, duration)
+
+    @contextmanager
+    def switch(self, label):
+        """Wraps one complete switch; nested calls join the outer switch."""
+        if self._current is not None:
+            yield
+            return
+
+        self._current = {"scanned": 0, "moved": 0, "failed": 0, "rolled_back": 0}
+        profiler = None
+        if self.profile_next:
+            self.profile_next = False
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self._store_profile(profiler, label)
+
+            counts = self._current
+            self._current = None
+            self.switches += 1
+            for key, value in counts.items():
+                self.totals[key] += value
+            self.last = dict(counts, label=label, ms=duration * 1000.0)
+            self.histograms["total"].add(duration)
+            self._event(f"switch: {label}", start, duration, counts)
+            log.debug("Switch to %s: scanned %d, moved %d, failed %d in %.2f ms",
+                      label, counts["scanned"], counts["moved"], counts["failed"],
+                      duration * 1000.0)
+
+    def _store_profile(self, profiler, label):
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(25)
+        self.last_profile = stream.getvalue()
+        log.info("Profile of switch to %s:\n%s", label, self.last_profile)
+
+    def export_chrome_trace(self, filepath):
+        """Writes the recorded timeline as Chrome trace-event JSON."""
+        data = {
+            "traceEvents": list(self.trace),
+            "displayTimeUnit": "ms",
+        }
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        return len(data["traceEvents"])
+
+
+metrics = SwitchMetrics()
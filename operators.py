@@ -1,6 +1,18 @@
 import bpy
-from .core import PanelScanner, PanelManager
-from .constants import ADDON_ID
+from . import discovery
+from . import library
+from . import scheduler
+from .preferences import (
+    tag_groups_changed,
+    group_members,
+    set_group_member,
+    set_group_members,
+    sync_category_table,
+    unique_group_name,
+)
+from .metrics import metrics
+from .core import PanelScanner, PanelManager, registry
+from .constants import ADDON_ID, log
 
 class NPANEL_OT_AddGroup(bpy.types.Operator):
     bl_idname = "npanel.add_group"
@@ -10,22 +22,16 @@ class NPANEL_OT_AddGroup(bpy.types.Operator):
     
     def execute(self, context):
         prefs = context.preferences.addons[ADDON_ID].preferences
+        # Caches and includes refer to groups by name, so names stay unique
+        name = unique_group_name(prefs, self.name)
         group = prefs.groups.add()
-        group.name = self.name
+        group.name = name
         
-        # Populate with current categories
-        PanelScanner.ensure_original_categories_stored()
+        # Make sure the editor lists the current categories, the new group
+        # itself starts with no members
+        sync_category_table(prefs, PanelScanner.get_original_categories())
         
-        cats = set()
-        for cls in PanelScanner.get_all_n_panels():
-            cat = getattr(cls, '_npanel_orig_category', getattr(cls, 'bl_category', 'Item'))
-            cats.add(cat)
-            
-        for cat_name in sorted(list(cats)):
-            item = group.categories.add()
-            item.name = cat_name
-            item.enabled = False 
-            
+        tag_groups_changed()
         return {'FINISHED'}
     
     def invoke(self, context, event):
@@ -40,6 +46,8 @@ class NPANEL_OT_RemoveGroup(bpy.types.Operator):
     def execute(self, context):
         prefs = context.preferences.addons[ADDON_ID].preferences
         prefs.groups.remove(self.index)
+        scheduler.group_removed(self.index)
+        tag_groups_changed()
         return {'FINISHED'}
 
 class NPANEL_OT_ApplyGroup(bpy.types.Operator):
@@ -48,19 +56,32 @@ class NPANEL_OT_ApplyGroup(bpy.types.Operator):
     
     group_index: bpy.props.IntProperty()
     
+    def execute(self, context):
+        # Out-of-range index means "restore all"
+        scheduler.request_switch(self.group_index, delay=0.0)
+        return {'FINISHED'}
+
+class NPANEL_OT_PreviewGroup(bpy.types.Operator):
+    bl_idname = "npanel.preview_group"
+    bl_label = "Preview Switch"
+    bl_description = "Report which panels applying this group would move, without moving them"
+    
+    group_index: bpy.props.IntProperty()
+    
     def execute(self, context):
         prefs = context.preferences.addons[ADDON_ID].preferences
         if self.group_index < 0 or self.group_index >= len(prefs.groups):
-            # Restore all
-            PanelManager.restore_all(context)
-            prefs.active_group_index = -1
-            prefs.is_filtering = False
-            return {'FINISHED'}
-            
-        group = prefs.groups[self.group_index]
-        PanelManager.apply_group(context, group.name)
-        prefs.active_group_index = self.group_index
-        prefs.is_filtering = True
+            plan = PanelManager.plan_restore(context)
+        else:
+            plan = PanelManager.plan_group(context, prefs.groups[self.group_index].name)
+        
+        for cls in sorted(plan.to_hide, key=lambda c: c.__name__):
+            log.info("  hide %s (%s)", cls.__name__, cls._npanel_orig_category)
+        for cls in sorted(plan.to_show, key=lambda c: c.__name__):
+            log.info("  show %s (%s)", cls.__name__, cls._npanel_orig_category)
+        
+        self.report({'INFO'}, f"{plan.move_count} panels would move "
+                              f"(~{plan.estimated_seconds * 1000:.1f} ms)")
         return {'FINISHED'}
 
 class NPANEL_OT_RestoreAll(bpy.types.Operator):
@@ -68,33 +89,18 @@ class NPANEL_OT_RestoreAll(bpy.types.Operator):
     bl_label = "Show All"
     
     def execute(self, context):
-        prefs = context.preferences.addons[ADDON_ID].preferences
-        PanelManager.restore_all(context)
-        prefs.is_filtering = False
-        prefs.active_group_index = -1
+        scheduler.request_switch(scheduler.SHOW_ALL, delay=0.0)
         return {'FINISHED'}
 
 class NPANEL_OT_RefreshCategories(bpy.types.Operator):
     bl_idname = "npanel.refresh_categories"
     bl_label = "Refresh Categories"
+    bl_description = "Rescan all panels for new or removed tabs now"
     
     def execute(self, context):
-        # Syncs available categories to all groups
-        PanelScanner.ensure_original_categories_stored()
-        
-        cats = set()
-        for cls in PanelScanner.get_all_n_panels():
-            cat = getattr(cls, '_npanel_orig_category', getattr(cls, 'bl_category', 'Item'))
-            cats.add(cat)
-        
-        prefs = context.preferences.addons[ADDON_ID].preferences
-        for group in prefs.groups:
-            existing = {c.name for c in group.categories}
-            for cat in cats:
-                if cat not in existing:
-                    new_item = group.categories.add()
-                    new_item.name = cat
-                    new_item.enabled = False
+        # Full rescan; the discovery timer normally keeps the shared table
+        # current on its own. Groups only store members, they need no update.
+        discovery.sync(force=True)
         
         return {'FINISHED'}
 
@@ -107,35 +113,186 @@ class NPANEL_OT_ApplyPreset(bpy.types.Operator):
     
     def execute(self, context):
         from .presets import match_preset_to_categories
-        from .core import PanelScanner
         
         prefs = context.preferences.addons[ADDON_ID].preferences
         
         # Get all available categories
-        PanelScanner.ensure_original_categories_stored()
-        cats = set()
-        for cls in PanelScanner.get_all_n_panels():
-            cat = getattr(cls, '_npanel_orig_category', getattr(cls, 'bl_category', 'Item'))
-            cats.add(cat)
+        cats = PanelScanner.get_original_categories()
         
         # Match preset against available categories
-        matches = match_preset_to_categories(self.preset_name, list(cats))
+        matches = match_preset_to_categories(self.preset_name, cats)
         
         if not matches:
             self.report({'WARNING'}, f"No matching tabs found for '{self.preset_name}'")
             return {'CANCELLED'}
         
         # Create a new group
+        name = unique_group_name(prefs, self.preset_name)
         group = prefs.groups.add()
-        group.name = self.preset_name
+        group.name = name
+        
+        # Store the matched ones as members
+        sync_category_table(prefs, cats)
+        set_group_members(prefs, group, matches)
+        tag_groups_changed()
         
-        # Add all categories, enable only the matched ones
-        for cat_name in sorted(list(cats)):
-            item = group.categories.add()
-            item.name = cat_name
-            item.enabled = cat_name in matches
+        self.report({'INFO'}, f"Created group '{group.name}' with {len(matches)} tabs")
+        return {'FINISHED'}
+
+class NPANEL_OT_ReloadPresets(bpy.types.Operator):
+    bl_idname = "npanel.reload_presets"
+    bl_label = "Reload Presets"
+    bl_description = "Re-read user preset files from the config folder"
+    
+    def execute(self, context):
+        from .presets import reload_user_presets, get_preset_names
         
-        self.report({'INFO'}, f"Created group '{self.preset_name}' with {len(matches)} tabs")
+        reload_user_presets()
+        self.report({'INFO'}, f"{len(get_preset_names())} presets available")
+        return {'FINISHED'}
+
+class NPANEL_OT_ToggleCategory(bpy.types.Operator):
+    bl_idname = "npanel.toggle_category"
+    bl_label = "Toggle Tab"
+    bl_description = "Include or exclude this tab in the group"
+    bl_options = {'INTERNAL'}
+    
+    group_index: bpy.props.IntProperty()
+    category: bpy.props.StringProperty()
+    
+    def execute(self, context):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        if self.group_index < 0 or self.group_index >= len(prefs.groups):
+            return {'CANCELLED'}
+        group = prefs.groups[self.group_index]
+        enabled = self.category in group_members(prefs, group)
+        set_group_member(prefs, group, self.category, not enabled)
+        return {'FINISHED'}
+
+class NPANEL_OT_AddInclude(bpy.types.Operator):
+    bl_idname = "npanel.add_include"
+    bl_label = "Include Group"
+    bl_description = "Fold another group's tabs into this one"
+    bl_options = {'INTERNAL'}
+    
+    group_index: bpy.props.IntProperty()
+    
+    def execute(self, context):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        if self.group_index < 0 or self.group_index >= len(prefs.groups):
+            return {'CANCELLED'}
+        prefs.groups[self.group_index].includes.add()
+        tag_groups_changed()
+        return {'FINISHED'}
+
+class NPANEL_OT_RemoveInclude(bpy.types.Operator):
+    bl_idname = "npanel.remove_include"
+    bl_label = "Remove Include"
+    bl_description = "Stop including this group"
+    bl_options = {'INTERNAL'}
+    
+    group_index: bpy.props.IntProperty()
+    index: bpy.props.IntProperty()
+    
+    def execute(self, context):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        if self.group_index < 0 or self.group_index >= len(prefs.groups):
+            return {'CANCELLED'}
+        includes = prefs.groups[self.group_index].includes
+        if 0 <= self.index < len(includes):
+            includes.remove(self.index)
+            tag_groups_changed()
+        return {'FINISHED'}
+
+class NPANEL_OT_AddRule(bpy.types.Operator):
+    bl_idname = "npanel.add_rule"
+    bl_label = "Add Rule"
+    bl_description = "Pick tabs by name, addon module or panel ID, kept up to date as addons change"
+    bl_options = {'INTERNAL'}
+    
+    group_index: bpy.props.IntProperty()
+    
+    def execute(self, context):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        if self.group_index < 0 or self.group_index >= len(prefs.groups):
+            return {'CANCELLED'}
+        prefs.groups[self.group_index].rules.add()
+        tag_groups_changed()
+        return {'FINISHED'}
+
+class NPANEL_OT_RemoveRule(bpy.types.Operator):
+    bl_idname = "npanel.remove_rule"
+    bl_label = "Remove Rule"
+    bl_description = "Remove this rule"
+    bl_options = {'INTERNAL'}
+    
+    group_index: bpy.props.IntProperty()
+    index: bpy.props.IntProperty()
+    
+    def execute(self, context):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        if self.group_index < 0 or self.group_index >= len(prefs.groups):
+            return {'CANCELLED'}
+        rules = prefs.groups[self.group_index].rules
+        if 0 <= self.index < len(rules):
+            rules.remove(self.index)
+            tag_groups_changed()
+        return {'FINISHED'}
+
+_addon_items = []  # Blender needs the enum item strings kept alive
+
+
+def _addon_enum_items(self, context):
+    """Addons with sidebar panels, from the panel index."""
+    reg = registry.ensure()
+    _addon_items[:] = [
+        (addon, addon, f"{len(panels)} panels in {len(reg.addon_categories(addon))} tabs")
+        for addon, panels in sorted(reg.by_addon.items())
+    ]
+    return _addon_items
+
+class NPANEL_OT_AddAddon(bpy.types.Operator):
+    bl_idname = "npanel.add_addon"
+    bl_label = "Add Addon"
+    bl_description = "Show or hide every panel of an addon, whatever tab it is on"
+    bl_options = {'INTERNAL'}
+    bl_property = "module"
+    
+    group_index: bpy.props.IntProperty()
+    module: bpy.props.EnumProperty(name="Addon", items=_addon_enum_items)
+    
+    def invoke(self, context, event):
+        context.window_manager.invoke_search_popup(self)
+        return {'RUNNING_MODAL'}
+    
+    def execute(self, context):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        if self.group_index < 0 or self.group_index >= len(prefs.groups):
+            return {'CANCELLED'}
+        group = prefs.groups[self.group_index]
+        if any(entry.module == self.module for entry in group.addons):
+            return {'CANCELLED'}
+        group.addons.add().module = self.module
+        tag_groups_changed()
+        return {'FINISHED'}
+
+class NPANEL_OT_RemoveAddon(bpy.types.Operator):
+    bl_idname = "npanel.remove_addon"
+    bl_label = "Remove Addon"
+    bl_description = "Stop showing or hiding this addon"
+    bl_options = {'INTERNAL'}
+    
+    group_index: bpy.props.IntProperty()
+    index: bpy.props.IntProperty()
+    
+    def execute(self, context):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        if self.group_index < 0 or self.group_index >= len(prefs.groups):
+            return {'CANCELLED'}
+        addons = prefs.groups[self.group_index].addons
+        if 0 <= self.index < len(addons):
+            addons.remove(self.index)
+            tag_groups_changed()
         return {'FINISHED'}
 
 class NPANEL_OT_ClearSearch(bpy.types.Operator):
@@ -150,45 +307,31 @@ class NPANEL_OT_ClearSearch(bpy.types.Operator):
 
 
 class NPANEL_OT_ExportGroups(bpy.types.Operator):
-    """Export groups to a JSON file"""
+    """Export groups to a library file"""
     bl_idname = "npanel.export_groups"
     bl_label = "Export Groups"
-    bl_description = "Save groups to a JSON file"
+    bl_description = "Save groups to a library file"
     
     filepath: bpy.props.StringProperty(subtype='FILE_PATH')
-    filter_glob: bpy.props.StringProperty(default='*.json', options={'HIDDEN'})
+    filter_glob: bpy.props.StringProperty(default='*.jsonl;*.gz', options={'HIDDEN'})
+    compress: bpy.props.BoolProperty(
+        name="Compress",
+        description="Write a gzip-compressed library (.jsonl.gz)",
+        default=False
+    )
     
     def execute(self, context):
-        import json
-        
         prefs = context.preferences.addons[ADDON_ID].preferences
         
-        # Build export data
-        export_data = {
-            "version": "1.0",
-            "groups": []
-        }
-        
-        for group in prefs.groups:
-            group_data = {
-                "name": group.name,
-                "workspace_name": group.workspace_name,
-                "categories": [
-                    {"name": cat.name, "enabled": cat.enabled}
-                    for cat in group.categories
-                ]
-            }
-            export_data["groups"].append(group_data)
-        
-        # Write to file
         filepath = self.filepath
-        if not filepath.endswith('.json'):
-            filepath += '.json'
+        for ext in ('.gz', '.jsonl', '.json'):
+            if filepath.endswith(ext):
+                filepath = filepath[:-len(ext)]
+        filepath += '.jsonl.gz' if self.compress else '.jsonl'
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2)
-            self.report({'INFO'}, f"Exported {len(prefs.groups)} groups to {filepath}")
+            count = library.export_groups(prefs, filepath)
+            self.report({'INFO'}, f"Exported {count} groups to {filepath}")
         except Exception as e:
             self.report({'ERROR'}, f"Export failed: {e}")
             return {'CANCELLED'}
@@ -201,82 +344,114 @@ class NPANEL_OT_ExportGroups(bpy.types.Operator):
 
 
 class NPANEL_OT_ImportGroups(bpy.types.Operator):
-    """Import groups from a JSON file"""
+    """Import groups from a library file"""
     bl_idname = "npanel.import_groups"
     bl_label = "Import Groups"
-    bl_description = "Load groups from a JSON file"
+    bl_description = "Load groups from a library file (.jsonl, .jsonl.gz or 1.0 .json)"
     
     filepath: bpy.props.StringProperty(subtype='FILE_PATH')
-    filter_glob: bpy.props.StringProperty(default='*.json', options={'HIDDEN'})
-    replace_existing: bpy.props.BoolProperty(
-        name="Replace Existing",
-        description="Replace all existing groups (unchecked = merge)",
-        default=False
+    filter_glob: bpy.props.StringProperty(default='*.json;*.jsonl;*.gz', options={'HIDDEN'})
+    merge_strategy: bpy.props.EnumProperty(
+        name="Merge",
+        description="How imported groups combine with existing ones",
+        items=library.MERGE_STRATEGIES,
+        default='SKIP'
     )
     
     def execute(self, context):
-        import json
-        
         prefs = context.preferences.addons[ADDON_ID].preferences
         
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                import_data = json.load(f)
+            added, merged, skipped = library.import_groups(prefs, self.filepath, self.merge_strategy)
         except Exception as e:
             self.report({'ERROR'}, f"Import failed: {e}")
             return {'CANCELLED'}
         
-        # Validate
-        if "groups" not in import_data:
-            self.report({'ERROR'}, "Invalid file format")
-            return {'CANCELLED'}
-        
-        # Clear existing if replace mode
-        if self.replace_existing:
-            prefs.groups.clear()
+        if self.merge_strategy == 'REPLACE':
+            # The old groups are gone, bring every tab back
+            scheduler.clear_areas()
+            scheduler.request_switch(scheduler.SHOW_ALL, delay=0.0)
         
-        # Get existing group names for merge mode
-        existing_names = {g.name for g in prefs.groups}
+        self.report({'INFO'}, f"Imported {added} groups, merged {merged}, skipped {skipped} duplicates")
+        return {'FINISHED'}
+    
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+class NPANEL_OT_ProfileNextSwitch(bpy.types.Operator):
+    bl_idname = "npanel.profile_next_switch"
+    bl_label = "Profile Next Switch"
+    bl_description = "Capture a cProfile of the next group switch and print it to the console"
+    
+    def execute(self, context):
+        metrics.profile_next = True
+        self.report({'INFO'}, "The next group switch will be profiled")
+        return {'FINISHED'}
+
+
+class NPANEL_OT_ExportTrace(bpy.types.Operator):
+    """Export recorded switch timings as Chrome trace-event JSON"""
+    bl_idname = "npanel.export_trace"
+    bl_label = "Export Trace"
+    bl_description = "Save the switch timeline for chrome://tracing or Perfetto"
+    
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH')
+    filter_glob: bpy.props.StringProperty(default='*.json', options={'HIDDEN'})
+    
+    def execute(self, context):
+        filepath = self.filepath
+        if not filepath.endswith('.json'):
+            filepath += '.json'
         
-        imported_count = 0
-        for group_data in import_data["groups"]:
-            name = group_data.get("name", "Imported Group")
-            
-            # Skip duplicates in merge mode
-            if not self.replace_existing and name in existing_names:
-                continue
-            
-            # Create group
-            group = prefs.groups.add()
-            group.name = name
-            group.workspace_name = group_data.get("workspace_name", "")
-            
-            # Add categories
-            for cat_data in group_data.get("categories", []):
-                cat = group.categories.add()
-                cat.name = cat_data.get("name", "")
-                cat.enabled = cat_data.get("enabled", False)
-            
-            imported_count += 1
+        try:
+            count = metrics.export_chrome_trace(filepath)
+        except Exception as e:
+            self.report({'ERROR'}, f"Export failed: {e}")
+            return {'CANCELLED'}
         
-        self.report({'INFO'}, f"Imported {imported_count} groups")
+        self.report({'INFO'}, f"Exported {count} trace events to {filepath}")
         return {'FINISHED'}
     
     def invoke(self, context, event):
+        self.filepath = "npanel_trace.json"
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
 
+class NPANEL_OT_ResetMetrics(bpy.types.Operator):
+    bl_idname = "npanel.reset_metrics"
+    bl_label = "Reset"
+    bl_description = "Clear the collected switch metrics"
+    
+    def execute(self, context):
+        metrics.reset()
+        return {'FINISHED'}
+
+
 classes = (
     NPANEL_OT_AddGroup,
     NPANEL_OT_RemoveGroup,
     NPANEL_OT_ApplyGroup,
+    NPANEL_OT_PreviewGroup,
     NPANEL_OT_RestoreAll,
     NPANEL_OT_RefreshCategories,
     NPANEL_OT_ApplyPreset,
+    NPANEL_OT_ReloadPresets,
+    NPANEL_OT_ToggleCategory,
+    NPANEL_OT_AddInclude,
+    NPANEL_OT_RemoveInclude,
+    NPANEL_OT_AddRule,
+    NPANEL_OT_RemoveRule,
+    NPANEL_OT_AddAddon,
+    NPANEL_OT_RemoveAddon,
     NPANEL_OT_ClearSearch,
     NPANEL_OT_ExportGroups,
     NPANEL_OT_ImportGroups,
+    NPANEL_OT_ProfileNextSwitch,
+    NPANEL_OT_ExportTrace,
+    NPANEL_OT_ResetMetrics,
 )
 
 def register_classes():
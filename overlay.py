@@ -7,12 +7,17 @@ import bpy
 import gpu
 from gpu_extras.batch import batch_for_shader
 import blf
-from .constants import ADDON_ID
+from . import redraw
+from . import scheduler
+from . import usage
+from .constants import ADDON_ID, log
 
 # Global state
 _draw_handler = None
 _is_visible = False
 _hide_timer = None
+_target_area = None  # as_pointer() of the area the overlay is shown in
+_scroll_ring = None  # group indices in scroll order, frozen while the overlay shows
 
 
 def get_prefs():
@@ -22,47 +27,168 @@ def get_prefs():
         return None
 
 
-def draw_rounded_rect(x, y, width, height, color):
-    """Draw a rectangle."""
-    shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-    
-    vertices = [
-        (x, y),
-        (x + width, y),
-        (x + width, y + height),
-        (x, y + height),
-    ]
-    indices = [(0, 1, 2), (0, 2, 3)]
-    
-    batch = batch_for_shader(shader, 'TRIS', {"pos": vertices}, indices=indices)
-    shader.bind()
-    shader.uniform_float("color", color)
-    batch.draw(shader)
+# Layout settings, in pixels at 1.0 UI scale
+PADDING = 12
+BUTTON_HEIGHT = 32
+BUTTON_SPACING = 6
+MIN_BUTTON_WIDTH = 90
+FONT_SIZE = 13
+BOTTOM_OFFSET = 60
 
+BORDER_COLOR = (0.4, 0.4, 0.4, 0.95)
+BACKGROUND_COLOR = (0.12, 0.12, 0.12, 0.95)
+ACTIVE_GROUP_COLOR = (0.55, 0.30, 0.65, 1.0)     # Purple for active
+ACTIVE_SHOW_ALL_COLOR = (0.25, 0.55, 0.35, 1.0)  # Green for active
+INACTIVE_COLOR = (0.25, 0.25, 0.25, 0.9)         # Gray for inactive
+
+_shader = None
+_layout = None
+_text_widths = {}  # (text, size) -> measured width
 
-def draw_text(text, x, y, size=14, color=(1, 1, 1, 1)):
-    """Draw text at position."""
-    font_id = 0
-    blf.size(font_id, size)
-    blf.color(font_id, *color)
-    blf.position(font_id, x, y, 0)
-    blf.draw(font_id, text)
+
+def get_shader():
+    """Builtin per-vertex color shader, fetched once."""
+    global _shader
+    if _shader is None:
+        _shader = gpu.shader.from_builtin('FLAT_COLOR')
+    return _shader
 
 
 def get_text_width(text, size=14):
-    """Get width of text."""
-    font_id = 0
-    blf.size(font_id, size)
-    return blf.dimensions(font_id, text)[0]
+    """Get width of text, measured once per text and size."""
+    key = (text, size)
+    width = _text_widths.get(key)
+    if width is None:
+        font_id = 0
+        blf.size(font_id, size)
+        width = blf.dimensions(font_id, text)[0]
+        _text_widths[key] = width
+    return width
+
+
+class OverlayLayout:
+    """
+    Everything the overlay draws for one state: a single batch holding all
+    rectangles and the placed button labels. Rebuilt only when the key
+    (entries in scroll order, active index, region size, UI scale/DPI) changes.
+    """
+
+    def __init__(self, key):
+        entries, active_idx, region_width, _region_height, scale, _dpi = key
+        self.key = key
+        self.font_size = round(FONT_SIZE * scale)
+        self.labels = []
+
+        padding = PADDING * scale
+        button_height = BUTTON_HEIGHT * scale
+        button_spacing = BUTTON_SPACING * scale
+        min_button_width = MIN_BUTTON_WIDTH * scale
+
+        button_widths = [
+            max(min_button_width, get_text_width(text, self.font_size) + 30 * scale)
+            for text, _ in entries
+        ]
+
+        total_width = sum(button_widths) + button_spacing * (len(button_widths) - 1) + padding * 2
+        total_height = button_height + padding * 2
+
+        # Position at bottom center of viewport
+        start_x = (region_width - total_width) / 2
+        start_y = BOTTOM_OFFSET * scale
+
+        rects = [
+            (start_x - 2, start_y - 2, total_width + 4, total_height + 4, BORDER_COLOR),
+            (start_x, start_y, total_width, total_height, BACKGROUND_COLOR),
+        ]
+
+        current_x = start_x + padding
+        button_y = start_y + padding
+        for (text, index), btn_width in zip(entries, button_widths):
+            is_active = (active_idx == index)
+            if not is_active:
+                color = INACTIVE_COLOR
+            elif index == -1:
+                color = ACTIVE_SHOW_ALL_COLOR
+            else:
+                color = ACTIVE_GROUP_COLOR
+            rects.append((current_x, button_y, btn_width, button_height, color))
+
+            if is_active:
+                text = "✓ " + text
+            text_w = get_text_width(text, self.font_size)
+            text_x = current_x + (btn_width - text_w) / 2
+            text_y = button_y + (button_height - self.font_size) / 2 + 2 * scale
+            self.labels.append((text, text_x, text_y))
+
+            current_x += btn_width + button_spacing
+
+        self.batch = self._build_batch(rects)
+
+    @staticmethod
+    def _build_batch(rects):
+        positions = []
+        colors = []
+        indices = []
+        for x, y, width, height, color in rects:
+            base = len(positions)
+            positions.extend(((x, y), (x + width, y), (x + width, y + height), (x, y + height)))
+            colors.extend((color,) * 4)
+            indices.append((base, base + 1, base + 2))
+            indices.append((base, base + 2, base + 3))
+        return batch_for_shader(
+            get_shader(), 'TRIS', {"pos": positions, "color": colors}, indices=indices
+        )
+
+
+def _active_index(prefs):
+    """Group shown in the target area: -1 = Show All, 0+ = group index."""
+    if scheduler.per_area_enabled(prefs) and _target_area is not None:
+        return scheduler.area_selection(prefs, _target_area)
+    return prefs.active_group_index if prefs.is_filtering else -1
+
+
+def get_scroll_ring(prefs):
+    """Scroll order, taken once per burst so it can't reshuffle under the wheel."""
+    global _scroll_ring
+    if _scroll_ring is None or len(_scroll_ring) != len(prefs.groups) + 1:
+        _scroll_ring = usage.scroll_ring(prefs)
+    return _scroll_ring
+
+
+def get_layout(prefs, region):
+    """Returns the cached layout, rebuilding it if any input changed."""
+    global _layout
+
+    active_idx = _active_index(prefs)
+    system = bpy.context.preferences.system
+    # Buttons in scroll order, "Show All" (-1) last
+    entries = tuple(
+        (prefs.groups[i].name if i >= 0 else "Show All", i)
+        for i in get_scroll_ring(prefs)
+    )
+    key = (
+        entries,
+        active_idx,
+        region.width,
+        region.height,
+        system.ui_scale,
+        system.dpi,
+    )
+    if _layout is None or _layout.key != key:
+        _layout = OverlayLayout(key)
+    return _layout
 
 
 def draw_overlay_callback():
     """Main draw callback for the floating overlay."""
-    global _is_visible
-    
     if not _is_visible:
         return
     
+    # The handler is per space type, only draw in the scrolled area
+    area = bpy.context.area
+    if area is None or area.as_pointer() != _target_area:
+        return
+    
     prefs = get_prefs()
     if not prefs or len(prefs.groups) == 0:
         return
@@ -72,103 +198,61 @@ def draw_overlay_callback():
     if not region:
         return
     
-    # Layout settings
-    padding = 12
-    button_height = 32
-    button_spacing = 6
-    min_button_width = 90
-    
-    # Calculate button widths
-    button_widths = []
-    for group in prefs.groups:
-        text_width = get_text_width(group.name, 13)
-        button_widths.append(max(min_button_width, text_width + 30))
-    
-    # Add "Show All" option
-    show_all_width = max(min_button_width, get_text_width("Show All", 13) + 30)
-    button_widths.append(show_all_width)
-    
-    total_width = sum(button_widths) + button_spacing * (len(button_widths) - 1) + padding * 2
-    total_height = button_height + padding * 2
-    
-    # Position at bottom center of viewport
-    start_x = (region.width - total_width) / 2
-    start_y = 60
+    layout = get_layout(prefs, region)
     
     # Enable blending
     gpu.state.blend_set('ALPHA')
     
-    # Draw background panel with border
-    border_color = (0.4, 0.4, 0.4, 0.95)
-    draw_rounded_rect(start_x - 2, start_y - 2, total_width + 4, total_height + 4, border_color)
-    
-    bg_color = (0.12, 0.12, 0.12, 0.95)
-    draw_rounded_rect(start_x, start_y, total_width, total_height, bg_color)
-    
-    # Draw buttons
-    current_x = start_x + padding
-    button_y = start_y + padding
-    
-    # Determine which index is "active" for display
-    # -1 = Show All, 0+ = group index
-    if prefs.is_filtering:
-        active_idx = prefs.active_group_index
-    else:
-        active_idx = -1  # Show All
-    
-    for i, group in enumerate(prefs.groups):
-        is_active = (active_idx == i)
-        
-        # Button color
-        if is_active:
-            btn_color = (0.55, 0.30, 0.65, 1.0)  # Purple for active
-        else:
-            btn_color = (0.25, 0.25, 0.25, 0.9)  # Gray for inactive
-        
-        btn_width = button_widths[i]
-        draw_rounded_rect(current_x, button_y, btn_width, button_height, btn_color)
-        
-        # Draw text
-        text = group.name
-        if is_active:
-            text = "✓ " + text
-        
-        text_w = get_text_width(text, 13)
-        text_x = current_x + (btn_width - text_w) / 2
-        text_y = button_y + (button_height - 13) / 2 + 2
-        draw_text(text, text_x, text_y, 13, (1, 1, 1, 1))
-        
-        current_x += btn_width + button_spacing
-    
-    # Draw "Show All" button
-    is_show_all_active = (active_idx == -1)
-    if is_show_all_active:
-        btn_color = (0.25, 0.55, 0.35, 1.0)  # Green for active
-    else:
-        btn_color = (0.25, 0.25, 0.25, 0.9)
+    shader = get_shader()
+    shader.bind()
+    layout.batch.draw(shader)
     
-    draw_rounded_rect(current_x, button_y, show_all_width, button_height, btn_color)
-    text = "Show All"
-    if is_show_all_active:
-        text = "✓ " + text
-    text_w = get_text_width(text, 13)
-    text_x = current_x + (show_all_width - text_w) / 2
-    text_y = button_y + (button_height - 13) / 2 + 2
-    draw_text(text, text_x, text_y, 13, (1, 1, 1, 1))
+    font_id = 0
+    blf.size(font_id, layout.font_size)
+    blf.color(font_id, 1, 1, 1, 1)
+    for text, x, y in layout.labels:
+        blf.position(font_id, x, y, 0)
+        blf.draw(font_id, text)
     
     gpu.state.blend_set('NONE')
 
 
+def show_overlay(area):
+    """Show the overlay in one area, installing the draw handler on demand."""
+    global _draw_handler, _is_visible, _target_area
+    
+    _is_visible = True
+    _target_area = area.as_pointer()
+    if _draw_handler is None:
+        _draw_handler = bpy.types.SpaceView3D.draw_handler_add(
+            draw_overlay_callback, (), 'WINDOW', 'POST_PIXEL'
+        )
+    # The overlay only lives in the viewport region, the sidebar is untouched
+    redraw.request_region(_target_area, 'WINDOW')
+
+
+def remove_draw_handler():
+    global _draw_handler
+    if _draw_handler is not None:
+        bpy.types.SpaceView3D.draw_handler_remove(_draw_handler, 'WINDOW')
+        _draw_handler = None
+
+
 def hide_overlay():
     """Hide the overlay after delay."""
-    global _is_visible
+    global _is_visible, _hide_timer, _target_area, _scroll_ring
     _is_visible = False
+    _hide_timer = None
+    # Burst over, the next one picks up the new usage order
+    _scroll_ring = None
+    
+    # No draw callback at all while the overlay is hidden
+    remove_draw_handler()
     
-    # Force redraw
-    for window in bpy.context.window_manager.windows:
-        for area in window.screen.areas:
-            if area.type == 'VIEW_3D':
-                area.tag_redraw()
+    # Redraw the viewport region it was drawn in, a closed area is skipped
+    if _target_area is not None:
+        redraw.request_region(_target_area, 'WINDOW')
+    _target_area = None
     
     return None  # Don't repeat timer
 
@@ -182,7 +266,7 @@ class NPANEL_OT_ScrollSwitch(bpy.types.Operator):
     direction: bpy.props.IntProperty(default=0)  # 1 = next, -1 = previous
     
     def execute(self, context):
-        global _is_visible, _hide_timer
+        global _hide_timer
         
         prefs = get_prefs()
         if not prefs:
@@ -193,7 +277,8 @@ class NPANEL_OT_ScrollSwitch(bpy.types.Operator):
             return {'CANCELLED'}
         
         # Show overlay
-        _is_visible = True
+        if context.area is not None:
+            show_overlay(context.area)
         
         # Cancel existing timer
         if _hide_timer is not None:
@@ -208,42 +293,23 @@ class NPANEL_OT_ScrollSwitch(bpy.types.Operator):
         
         # Calculate current index
         # -1 = Show All, 0 to N-1 = groups
-        if prefs.is_filtering:
-            current = prefs.active_group_index
-        else:
-            current = -1  # Show All
-        
-        # Calculate new index
-        new_index = current + self.direction
-        max_index = len(prefs.groups) - 1
+        per_area = scheduler.per_area_enabled(prefs) and context.area is not None
+        current = _active_index(prefs)
         
-        # Wrap around: -1 (Show All) <-> 0 <-> ... <-> max_index <-> -1
-        if new_index > max_index:
-            new_index = -1  # Wrap to Show All
-        elif new_index < -1:
-            new_index = max_index  # Wrap to last group
-        
-        # Apply the selection
-        from .core import PanelManager
+        # Step along the ring, wrapping through Show All (-1)
+        new_index = usage.step(get_scroll_ring(prefs), current, self.direction)
         
+        if per_area:
+            # Only this viewport changes, a gate table update needs no settling
+            scheduler.switch_area(context.area, new_index)
+        else:
+            # Select now so the overlay follows the wheel, panels move once
+            # the scrolling settles
+            scheduler.request_switch(new_index)
         if new_index == -1:
-            # Show All
-            PanelManager.restore_all(context)
-            prefs.is_filtering = False
-            prefs.active_group_index = -1
             self.report({'INFO'}, "Show All")
         else:
-            # Apply group
-            group = prefs.groups[new_index]
-            PanelManager.apply_group(context, group.name)
-            prefs.active_group_index = new_index
-            prefs.is_filtering = True
-            self.report({'INFO'}, f"Group: {group.name}")
-        
-        # Force redraw
-        for area in context.screen.areas:
-            if area.type == 'VIEW_3D':
-                area.tag_redraw()
+            self.report({'INFO'}, f"Group: {prefs.groups[new_index].name}")
         
         return {'FINISHED'}
 
@@ -253,14 +319,9 @@ addon_keymaps = []
 
 
 def register():
-    global _draw_handler
-    
     bpy.utils.register_class(NPANEL_OT_ScrollSwitch)
     
-    # Add draw handler
-    _draw_handler = bpy.types.SpaceView3D.draw_handler_add(
-        draw_overlay_callback, (), 'WINDOW', 'POST_PIXEL'
-    )
+    # The draw handler is only added while the overlay is shown
     
     # Add keymaps
     wm = bpy.context.window_manager
@@ -290,13 +351,18 @@ def register():
         kmi.properties.direction = -1
         addon_keymaps.append((km, kmi))
     
-    print("[N-Panel Manager] Scroll overlay registered (Ctrl+Shift+Scroll)")
+    log.debug("Scroll overlay registered (Ctrl+Shift+Scroll)")
 
 
 def unregister():
-    global _draw_handler, _is_visible, _hide_timer
+    global _is_visible, _hide_timer, _target_area, _layout, _shader, _scroll_ring
     
     _is_visible = False
+    _target_area = None
+    _scroll_ring = None
+    _layout = None
+    _shader = None
+    _text_widths.clear()
     
     # Cancel timer
     if _hide_timer is not None:
@@ -311,8 +377,6 @@ def unregister():
     addon_keymaps.clear()
     
     # Remove draw handler
-    if _draw_handler:
-        bpy.types.SpaceView3D.draw_handler_remove(_draw_handler, 'WINDOW')
-        _draw_handler = None
+    remove_draw_handler()
     
     bpy.utils.unregister_class(NPANEL_OT_ScrollSwitch)
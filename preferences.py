@@ -1,29 +1,500 @@
 import bpy
 from bpy.props import StringProperty, CollectionProperty, BoolProperty, PointerProperty
 from bpy.types import PropertyGroup, AddonPreferences
-from .constants import ADDON_ID
+from .constants import ADDON_ID, SPACE_TYPES, SPACE_TYPE_IDS, log, set_log_level
+from .rules import RULE_KINDS, compile_rule, clear as clear_rules
+
+
+def _update_log_level(self, context):
+    set_log_level(self.log_level)
+
+
+def _update_per_area(self, context):
+    from . import redraw, scheduler
+    if not self.per_area_groups:
+        # Every area follows the global group again
+        scheduler.clear_areas()
+        redraw.request_sidebars(SPACE_TYPE_IDS)
+
+
+def _update_engine(self, context):
+    from . import scheduler
+    from .core import PanelManager
+    PanelManager.set_engine(self.engine)
+    scheduler.clear_areas()
+    # Re-apply the current selection with the new engine
+    scheduler.request_switch(self.active_group_index if self.is_filtering else scheduler.SHOW_ALL, 0.0)
+
+
+# Runtime caches over the stored membership, rebuilt lazily
+_category_ids = {}      # category name -> index in category_table
+_category_names = []    # index in category_table -> category name
+_member_cache = {}      # group name -> frozenset of member category names
+_resolved_cache = {}    # group name -> (members, shown addons, hidden addons), includes flattened in
+_dependents = None      # group name -> names of groups including it, None = stale
+_resolved_version = None  # registry version _resolved_cache was built against, rules depend on it
+
+
+def tag_groups_changed(self=None, context=None):
+    """
+    Drops runtime caches derived from the group list. Call after adding,
+    removing, renaming or relinking groups; also used as a property update callback.
+    """
+    global _dependents
+    from . import workspace
+    workspace.invalidate_index()
+    _member_cache.clear()
+    _resolved_cache.clear()
+    _dependents = None
+
+
+def unique_group_name(prefs, name, group=None):
+    """``name``, or ``name.001`` and up if a group other than ``group`` uses it."""
+    skip = group.as_pointer() if group is not None else None
+    taken = {g.name for g in prefs.groups if g.as_pointer() != skip}
+    if name not in taken:
+        return name
+    n = 1
+    while f"{name}.{n:03d}" in taken:
+        n += 1
+    return f"{name}.{n:03d}"
+
+
+def sync_group_names(prefs):
+    """
+    Renames groups sharing a name (caches and includes refer to groups by
+    name) and records every name for rename tracking. For groups stored by
+    older versions.
+    """
+    seen = set()
+    for group in prefs.groups:
+        if group.name in seen:
+            name = unique_group_name(prefs, group.name, group)
+            # Includes naming the original must not follow the duplicate
+            group.previous_name = name
+            group.name = name
+        elif group.previous_name != group.name:
+            group.previous_name = group.name
+        seen.add(group.name)
+
+
+def _update_group_name(self, context):
+    """Keeps group names unique; renames carry over to the includes that refer to the group."""
+    prefs = context.preferences.addons[ADDON_ID].preferences
+    unique = unique_group_name(prefs, self.name, self)
+    if unique != self.name:
+        # Runs this callback again with the unique name
+        self.name = unique
+        return
+    old = self.previous_name
+    if old and old != self.name:
+        for group in prefs.groups:
+            for include in group.includes:
+                if include.group_name == old:
+                    include.group_name = self.name
+    self.previous_name = self.name
+    tag_groups_changed()
+
+
+def _sync_category_cache(prefs):
+    # The table only ever grows, so its length tells whether we're current
+    table = prefs.category_table
+    if len(_category_names) != len(table):
+        _category_names[:] = [entry.name for entry in table]
+        _category_ids.clear()
+        _category_ids.update((name, i) for i, name in enumerate(_category_names))
+
+
+def intern_category(prefs, name):
+    """Returns the category_table index of a category, adding it if new."""
+    _sync_category_cache(prefs)
+    index = _category_ids.get(name)
+    if index is None:
+        entry = prefs.category_table.add()
+        entry.name = name
+        index = len(_category_names)
+        _category_names.append(name)
+        _category_ids[name] = index
+    return index
+
+
+def sync_category_table(prefs, names):
+    """Interns every given category name, so the editor can list them."""
+    for name in names:
+        intern_category(prefs, name)
+
+
+def _migrate_group(prefs, group):
+    """Moves a group from the old per-category flags to sparse members."""
+    enabled = [c.name for c in group.categories if c.enabled]
+    sync_category_table(prefs, [c.name for c in group.categories])
+    group.categories.clear()
+    set_group_members(prefs, group, enabled)
+    log.debug("Migrated group '%s' to sparse storage (%d members)", group.name, len(enabled))
+
+
+def migrate_groups(prefs):
+    """
+    Moves every group still in the old layout to sparse members. Writes to
+    the category table, so it must run at a safe point (first idle tick),
+    never from draw or list filter callbacks.
+    """
+    for group in prefs.groups:
+        if len(group.categories):
+            _migrate_group(prefs, group)
+
+
+def group_members(prefs, group):
+    """Frozenset of the category names enabled in a group, cached per group."""
+    members = _member_cache.get(group.name)
+    if members is None:
+        if len(group.categories):
+            # Not migrated yet, read the old layout without writing anything
+            members = frozenset(c.name for c in group.categories if c.enabled)
+            _member_cache[group.name] = members
+            return members
+        _sync_category_cache(prefs)
+        ids = [0] * len(group.members)
+        group.members.foreach_get("category_id", ids)
+        count = len(_category_names)
+        members = frozenset(_category_names[i] for i in ids if 0 <= i < count)
+        _member_cache[group.name] = members
+    return members
+
+
+def set_group_members(prefs, group, names):
+    """Replaces a group's members in bulk."""
+    # Replaces anything still in the old layout too
+    group.categories.clear()
+    ids = sorted(intern_category(prefs, name) for name in set(names))
+    group.members.clear()
+    for _ in ids:
+        group.members.add()
+    group.members.foreach_set("category_id", ids)
+    _member_cache.pop(group.name, None)
+    _invalidate_resolved(group.name)
+
+
+def set_group_member(prefs, group, name, enabled):
+    """Adds or removes a single category from a group."""
+    if len(group.categories):
+        _migrate_group(prefs, group)
+    members = group_members(prefs, group)
+    if (name in members) == enabled:
+        return
+    index = intern_category(prefs, name)
+    if enabled:
+        group.members.add().category_id = index
+    else:
+        for i, member in enumerate(group.members):
+            if member.category_id == index:
+                group.members.remove(i)
+                break
+    _member_cache.pop(group.name, None)
+    _invalidate_resolved(group.name)
+
+
+def _build_dependents(prefs):
+    global _dependents
+    _dependents = {}
+    for group in prefs.groups:
+        for include in group.includes:
+            _dependents.setdefault(include.group_name, set()).add(group.name)
+
+
+def _invalidate_resolved(name):
+    """Drops the flattened members of a group and of every group including it."""
+    if _dependents is None:
+        _resolved_cache.clear()
+        return
+    pending = [name]
+    seen = set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        _resolved_cache.pop(current, None)
+        pending.extend(_dependents.get(current, ()))
+
+
+_NO_ADDONS = frozenset()
+
+
+def _resolve(prefs, group, by_name, stack):
+    resolved = _resolved_cache.get(group.name)
+    if resolved is not None:
+        return resolved
+    if not len(group.includes) and not len(group.rules) and not len(group.addons):
+        # Flat group, nothing to copy
+        resolved = (group_members(prefs, group), _NO_ADDONS, _NO_ADDONS)
+    else:
+        stack.append(group.name)
+        members = set(group_members(prefs, group))
+        excluded = set()
+        shown = set()
+        hidden = set()
+        for entry in group.addons:
+            if entry.module:
+                (hidden if entry.mode == 'EXCLUDE' else shown).add(entry.module)
+        if len(group.rules):
+            from .core import registry
+            for rule in group.rules:
+                tabs = compile_rule(rule.kind, rule.pattern).tabs(registry)
+                (excluded if rule.mode == 'EXCLUDE' else members).update(tabs)
+        for include in group.includes:
+            target = by_name.get(include.group_name)
+            if target is None:
+                continue
+            if target.name in stack:
+                log.warning("Group '%s' includes itself through '%s', ignoring that include",
+                            group.name, target.name)
+                continue
+            sub_members, sub_shown, sub_hidden = _resolve(prefs, target, by_name, stack)
+            if include.mode == 'EXCLUDE':
+                excluded.update(sub_members)
+                hidden.update(sub_shown)
+            else:
+                members.update(sub_members)
+                shown.update(sub_shown)
+                hidden.update(sub_hidden)
+        stack.pop()
+        resolved = (frozenset(members - excluded), frozenset(shown - hidden), frozenset(hidden))
+    _resolved_cache[group.name] = resolved
+    return resolved
+
+
+def _resolved(prefs, group):
+    global _resolved_version
+    from .core import registry
+    if registry.version != _resolved_version:
+        _resolved_cache.clear()
+        _resolved_version = registry.version
+    resolved = _resolved_cache.get(group.name)
+    if resolved is not None:
+        return resolved
+    if _dependents is None:
+        _build_dependents(prefs)
+    by_name = {g.name: g for g in prefs.groups}
+    return _resolve(prefs, group, by_name, [])
+
+
+def resolve_members(prefs, group):
+    """
+    Members of a group with its included groups flattened in: own members,
+    UNION includes and rules, minus EXCLUDE includes and rules. Memoized per
+    group and dropped along the include graph when a constituent changes, so
+    applying a composite group costs the same as a flat one. Rules follow the
+    panel index, the whole cache is dropped when it is rebuilt.
+    """
+    return _resolved(prefs, group)[0]
+
+
+def resolve_addons(prefs, group):
+    """
+    (shown, hidden) addon packages of a group, includes flattened in the same
+    way. An EXCLUDE include hides the addons the included group shows.
+    """
+    _, shown, hidden = _resolved(prefs, group)
+    return shown, hidden
+
+
+def find_cycle(prefs, group):
+    """Names along an include cycle through ``group``, or None if there is none."""
+    by_name = {g.name: g for g in prefs.groups}
+    pending = [(group.name, [group.name])]
+    while pending:
+        name, path = pending.pop()
+        current = by_name.get(name)
+        if current is None:
+            continue
+        for include in current.includes:
+            if include.group_name == group.name:
+                return path + [group.name]
+            if include.group_name not in path:
+                pending.append((include.group_name, path + [include.group_name]))
+    return None
+
+
+class CategoryEntry(PropertyGroup):
+    """One interned category name, shared by all groups."""
+    name: StringProperty(name="Category Name")
+    # False while no registered panel uses this tab (addon disabled/removed)
+    available: BoolProperty(name="Available", default=True)
+
+class GroupMember(PropertyGroup):
+    # Index into NPANEL_Preferences.category_table
+    category_id: bpy.props.IntProperty(name="Category", default=-1)
+
+class GroupInclude(PropertyGroup):
+    """Another group folded into this one."""
+    group_name: StringProperty(name="Group", update=tag_groups_changed)
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        items=[
+            ('UNION', "Add", "Add the included group's tabs"),
+            ('EXCLUDE', "Remove", "Remove the included group's tabs"),
+        ],
+        default='UNION',
+        update=tag_groups_changed
+    )
+
+class GroupRule(PropertyGroup):
+    """Tabs picked by matching the panel index, see rules.py."""
+    kind: bpy.props.EnumProperty(
+        name="Match",
+        items=RULE_KINDS,
+        default='CATEGORY_GLOB',
+        update=tag_groups_changed
+    )
+    pattern: StringProperty(name="Pattern", update=tag_groups_changed)
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        items=[
+            ('UNION', "Add", "Add the matching tabs"),
+            ('EXCLUDE', "Remove", "Remove the matching tabs"),
+        ],
+        default='UNION',
+        update=tag_groups_changed
+    )
+
+class GroupAddon(PropertyGroup):
+    """Every panel of one addon package, whatever tab it is on."""
+    module: StringProperty(name="Addon", update=tag_groups_changed)
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        items=[
+            ('UNION', "Show", "Show every panel of this addon, even on tabs the group leaves out"),
+            ('EXCLUDE', "Hide", "Hide every panel of this addon, even on tabs the group shows"),
+        ],
+        default='UNION',
+        update=tag_groups_changed
+    )
 
 class IncludedCategory(PropertyGroup):
     name: StringProperty(name="Category Name")
     enabled: BoolProperty(name="Enabled", default=True)
 
 class PanelGroup(PropertyGroup):
-    name: StringProperty(name="Group Name")
-    # We use a collection to store which categories are "in" this group
+    name: StringProperty(name="Group Name", update=_update_group_name)
+    # Name before the last rename, so includes can follow it
+    previous_name: StringProperty(options={'HIDDEN'})
+    # Only the enabled categories are stored, as category_table indices.
+    # Use group_members() / set_group_member() rather than reading it directly.
+    members: CollectionProperty(type=GroupMember)
+    
+    # Legacy layout: every known category with an enabled flag.
+    # Migrated to 'members' on the first idle tick, see migrate_groups().
     categories: CollectionProperty(type=IncludedCategory)
     
     # Store workspace name as string (data-block pointers not allowed in AddonPrefs)
-    workspace_name: StringProperty(name="Linked Workspace", default="")
+    workspace_name: StringProperty(name="Linked Workspace", default="", update=tag_groups_changed)
+    
+    # Other groups folded in, see resolve_members()
+    includes: CollectionProperty(type=GroupInclude)
+    
+    # Tabs matched against the panel index, re-evaluated when addons change
+    rules: CollectionProperty(type=GroupRule)
+    
+    # Whole addons shown or hidden at panel level, see resolve_addons()
+    addons: CollectionProperty(type=GroupAddon)
+    
+    # Usage, drives pre-warming and the MRU scroll order
+    use_count: bpy.props.IntProperty(name="Uses", default=0, min=0)
+    last_used: bpy.props.FloatProperty(name="Last Used", default=0.0)
+    
+    # Editors whose sidebars this group filters, others keep their layout
+    space_types: bpy.props.EnumProperty(
+        name="Editors",
+        description="Editors whose sidebar tabs this group filters",
+        items=SPACE_TYPES,
+        options={'ENUM_FLAG'},
+        default={'VIEW_3D'}
+    )
 
 class NPANEL_Preferences(AddonPreferences):
     bl_idname = ADDON_ID
 
     groups: CollectionProperty(type=PanelGroup)
+    # Every category name any group refers to, stored once
+    category_table: CollectionProperty(type=CategoryEntry)
     active_group_index: bpy.props.IntProperty()
     
     # Store global state of whether we are currently "Filtering"
     is_filtering: BoolProperty(name="Is Filtering", default=False)
     
+    # Seconds of quiet before a scroll burst is actually applied
+    switch_settle_delay: bpy.props.FloatProperty(
+        name="Settle Delay",
+        description="Wait this long after the last group switch request before moving panels",
+        default=0.25,
+        min=0.0,
+        max=2.0,
+        subtype='TIME_ABSOLUTE',
+        unit='TIME_ABSOLUTE'
+    )
+    
+    engine: bpy.props.EnumProperty(
+        name="Engine",
+        description="How panels outside the active group are hidden",
+        items=[
+            ('RECATEGORY', "Re-category", "Re-register hidden panels under a hidden tab. Works with every panel, "
+                                         "costs a re-registration per moved panel"),
+            ('POLL', "Poll Gating", "Hide panels through their poll function. A switch only updates a table "
+                                   "and redraws the sidebars"),
+        ],
+        default='RECATEGORY',
+        update=_update_engine
+    )
+    
+    scroll_order: bpy.props.EnumProperty(
+        name="Scroll Order",
+        description="Order Ctrl+Shift+Scroll cycles through the groups",
+        items=[
+            ('STORAGE', "List Order", "Same order as the group list"),
+            ('MRU', "Most Recent", "Most recently used groups first, so they are one notch away"),
+        ],
+        default='STORAGE'
+    )
+    
+    # Needs the poll-gating engine, areas are told apart while polling
+    per_area_groups: BoolProperty(
+        name="Per-Area Groups",
+        description="Scroll switching only changes the group of the hovered viewport "
+                    "(needs the Poll Gating engine)",
+        default=False,
+        update=_update_per_area
+    )
+    
+    log_level: bpy.props.EnumProperty(
+        name="Log Level",
+        description="Console output of N-Panel Manager",
+        items=[
+            ('DEBUG', "Debug", "Everything, including per-switch timings"),
+            ('INFO', "Info", "Switches and restores"),
+            ('WARNING', "Warning", "Only problems, like panels that failed to move"),
+            ('ERROR', "Error", "Only errors"),
+            ('OFF', "Off", "No console output"),
+        ],
+        default='INFO',
+        update=_update_log_level
+    )
+    
+    # UI list selection, only needed by template_list
+    category_index: bpy.props.IntProperty()
+    dashboard_index: bpy.props.IntProperty()
+    
+    category_filter_mode: bpy.props.EnumProperty(
+        name="Show",
+        description="Which tabs the Included Tabs list shows",
+        items=[
+            ('ALL', "All", "Every known tab"),
+            ('ENABLED', "Enabled", "Only tabs included in the group"),
+            ('DISABLED', "Disabled", "Only tabs not included in the group"),
+        ],
+        default='ALL'
+    )
+    
     # Search filter for tab list
     search_filter: StringProperty(
         name="Search",
@@ -35,16 +506,86 @@ class NPANEL_Preferences(AddonPreferences):
         layout = self.layout
         layout.label(text="N-Panel Manager Preferences")
         
+        box = layout.box()
+        box.label(text="Switching", icon='ARROW_LEFTRIGHT')
+        box.prop(self, "engine")
+        row = box.row()
+        row.active = self.engine == 'POLL'
+        row.prop(self, "per_area_groups")
+        box.prop(self, "switch_settle_delay")
+        box.prop(self, "scroll_order")
+        
+        self.draw_diagnostics(layout.box())
+    
+    def draw_diagnostics(self, box):
+        from .metrics import metrics, startup_times, PHASES
+        
+        box.label(text="Diagnostics", icon='TIME')
+        box.prop(self, "log_level")
+        
+        col = box.column(align=True)
+        if startup_times["register"] is not None:
+            col.label(text=f"Registration: {startup_times['register'] * 1000:.1f} ms")
+        if startup_times["first_restore"] is not None:
+            col.label(text=f"First restore: {startup_times['first_restore'] * 1000:.1f} ms")
+        totals = metrics.totals
+        col.label(text=f"Switches: {metrics.switches}   Scanned: {totals['scanned']}   "
+                       f"Moved: {totals['moved']}   Failed: {totals['failed']}   "
+                       f"Rolled back: {totals['rolled_back']}")
+        if metrics.last:
+            last = metrics.last
+            col.label(text=f"Last: {last['label']} - {last['ms']:.1f} ms, "
+                           f"scanned {last['scanned']}, moved {last['moved']}, failed {last['failed']}")
+        
+        grid = box.grid_flow(row_major=True, columns=5, even_columns=True, align=True)
+        for header in ("Phase", "Count", "Mean ms", "p95 ms", "Max ms"):
+            grid.label(text=header)
+        for name in PHASES:
+            hist = metrics.histograms[name]
+            grid.label(text=name.title())
+            grid.label(text=str(hist.count))
+            grid.label(text=f"{hist.mean:.2f}")
+            grid.label(text=f"{hist.percentile(0.95):.2f}")
+            grid.label(text=f"{hist.max:.2f}")
+        
+        row = box.row(align=True)
+        row.operator("npanel.profile_next_switch", icon='REC', depress=metrics.profile_next)
+        row.operator("npanel.export_trace", icon='EXPORT')
+        row.operator("npanel.reset_metrics", icon='TRASH')
+        
 def register():
-    print(f"[N-Panel Manager] Registering IncludedCategory...")
+    global _dependents, _resolved_version
+    _category_ids.clear()
+    _category_names.clear()
+    _member_cache.clear()
+    _resolved_cache.clear()
+    _dependents = None
+    _resolved_version = None
+    clear_rules()
+    log.debug("Registering CategoryEntry...")
+    bpy.utils.register_class(CategoryEntry)
+    log.debug("Registering GroupMember...")
+    bpy.utils.register_class(GroupMember)
+    log.debug("Registering GroupInclude...")
+    bpy.utils.register_class(GroupInclude)
+    log.debug("Registering GroupRule...")
+    bpy.utils.register_class(GroupRule)
+    log.debug("Registering GroupAddon...")
+    bpy.utils.register_class(GroupAddon)
+    log.debug("Registering IncludedCategory...")
     bpy.utils.register_class(IncludedCategory)
-    print(f"[N-Panel Manager] Registering PanelGroup...")
+    log.debug("Registering PanelGroup...")
     bpy.utils.register_class(PanelGroup)
-    print(f"[N-Panel Manager] Registering NPANEL_Preferences with bl_idname='{ADDON_ID}'...")
+    log.debug("Registering NPANEL_Preferences with bl_idname='%s'...", ADDON_ID)
     bpy.utils.register_class(NPANEL_Preferences)
-    print(f"[N-Panel Manager] Preferences registered successfully!")
+    log.debug("Preferences registered successfully!")
 
 def unregister():
     bpy.utils.unregister_class(NPANEL_Preferences)
     bpy.utils.unregister_class(PanelGroup)
     bpy.utils.unregister_class(IncludedCategory)
+    bpy.utils.unregister_class(GroupAddon)
+    bpy.utils.unregister_class(GroupRule)
+    bpy.utils.unregister_class(GroupInclude)
+    bpy.utils.unregister_class(GroupMember)
+    bpy.utils.unregister_class(CategoryEntry)
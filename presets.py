@@ -1,8 +1,13 @@
 """
 Workflow presets for N-Panel Manager.
 Based on popular addons from Superhive, Blender Market, and other platforms.
+Users can add their own as JSON files, see load_user_presets().
 """
 
+import json
+import os
+import re
+
 # Each preset defines a list of tab/category names that are commonly associated
 # with that workflow. The addon will match these against installed N-Panel tabs.
 
@@ -109,28 +114,207 @@ PRESETS = {
     ],
 }
 
+# Spellings that name the same thing, by compacted (lowercase, alphanumeric
+# only) form -> canonical compacted form. Spacing/case variants like
+# "Hard Ops" / "HardOps" already compact to the same string.
+ALIASES = {
+    "arp": "autorigpro",
+    "modifiers": "modifier",
+    "materials": "material",
+    "shaders": "shader",
+    "uvs": "uv",
+    "rigging": "rig",
+    "lighting": "light",
+    "grove": "thegrove",
+}
+
+# Minimum score for a category to count as matching a preset
+MATCH_THRESHOLD = 0.6
+
+# Prefix matches need at least this many characters, so "UV" or "Tool"
+# never swallow "UV Packmaster" or "Toolkit"
+MIN_PREFIX_LENGTH = 5
+
+# Subfolder of the addon's config folder holding user preset JSON files
+USER_PRESET_FOLDER = "presets"
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def _canonical(compact):
+    return ALIASES.get(compact, compact)
+
+
+def normalize(text):
+    """Returns (canonical compact form, tuple of canonical word tokens)."""
+    lowered = text.lower()
+    tokens = tuple(_canonical(t) for t in _NON_ALNUM.split(lowered) if t)
+    return _canonical("".join(tokens)), tokens
+
+
+class PresetMatcher:
+    """
+    All preset patterns compiled into lookup tables. A category is
+    normalized once and scored against every preset:
+
+    1.0  same canonical name ("Hard Ops" == "HardOps")
+    0.8  every word of the pattern is a word of the category ("Zen UV" in "Zen UV Tools")
+    0.6  category starts with a long pattern ("HardOps" -> "HardOpsTools")
+
+    Short patterns ("UV", "Tool", "Item") only ever match whole words.
+    """
+
+    def __init__(self, presets):
+        self.preset_names = list(presets)
+        self._exact = {}      # compact -> set of preset names
+        self._by_token = {}   # token -> list of (preset, pattern tokens)
+        self._by_prefix = {}  # first MIN_PREFIX_LENGTH chars -> list of (preset, compact)
+        for preset, patterns in presets.items():
+            for pattern in patterns:
+                compact, tokens = normalize(pattern)
+                if not compact:
+                    continue
+                self._exact.setdefault(compact, set()).add(preset)
+                if tokens:
+                    self._by_token.setdefault(tokens[0], []).append((preset, frozenset(tokens)))
+                if len(compact) >= MIN_PREFIX_LENGTH:
+                    self._by_prefix.setdefault(compact[:MIN_PREFIX_LENGTH], []).append((preset, compact))
+        self._cache = {}
+
+    def score_category(self, category):
+        """Returns {preset name: best score} for one category."""
+        compact, tokens = normalize(category)
+        scores = {}
+
+        def offer(preset, score):
+            if score > scores.get(preset, 0.0):
+                scores[preset] = score
+
+        for preset in self._exact.get(compact, ()):
+            offer(preset, 1.0)
+
+        token_set = frozenset(tokens)
+        for token in token_set:
+            for preset, pattern_tokens in self._by_token.get(token, ()):
+                if pattern_tokens <= token_set:
+                    offer(preset, 0.8)
+
+        for preset, pattern in self._by_prefix.get(compact[:MIN_PREFIX_LENGTH], ()):
+            if compact.startswith(pattern):
+                offer(preset, 0.6)
+
+        return scores
+
+    def match_all(self, categories, key=None):
+        """
+        Returns {preset name: sorted list of matching categories}, cached per
+        ``key`` (defaults to the frozenset of categories). Pass a cheap key,
+        like a registry version, to skip hashing the category set.
+        """
+        if key is None:
+            categories = frozenset(categories)
+            key = categories
+        result = self._cache.get(key)
+        if result is None:
+            result = {name: [] for name in self.preset_names}
+            for category in categories:
+                for preset, score in self.score_category(category).items():
+                    if score >= MATCH_THRESHOLD:
+                        result[preset].append(category)
+            for matches in result.values():
+                matches.sort()
+            if len(self._cache) > 16:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+
+_matcher = None
+_user_presets = None
+
+
+def _user_preset_dir():
+    import bpy
+    from .constants import ADDON_ID
+    return bpy.utils.user_resource('CONFIG', path=os.path.join(ADDON_ID, USER_PRESET_FOLDER))
+
+
+def load_user_presets():
+    """
+    Reads every *.json file in the user preset folder. A file holds either
+    one preset, {"name": "...", "tabs": [...]}, or several,
+    {"presets": {"Name": [...], ...}}. User presets override built-in ones.
+    """
+    from .constants import log
+
+    presets = {}
+    try:
+        directory = _user_preset_dir()
+        filenames = sorted(f for f in os.listdir(directory) if f.lower().endswith('.json'))
+    except (OSError, ImportError):
+        return presets
+
+    for filename in filenames:
+        try:
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            log.warning("Skipping preset file %s: %s", filename, e)
+            continue
+        if not isinstance(data, dict) or not isinstance(data.get("presets", {}), dict):
+            log.warning("Skipping preset file %s: not a preset object", filename)
+            continue
+        if "presets" in data:
+            entries = data["presets"].items()
+        else:
+            entries = [(data.get("name", os.path.splitext(filename)[0]), data.get("tabs", []))]
+        for name, tabs in entries:
+            if isinstance(name, str) and isinstance(tabs, list):
+                presets[name] = [t for t in tabs if isinstance(t, str)]
+    return presets
+
+
+def get_all_presets():
+    """Built-in and user presets, user files loaded on first use."""
+    global _user_presets
+    if _user_presets is None:
+        # Set even if loading fails, the folder is not re-read on every redraw
+        _user_presets = {}
+        try:
+            _user_presets = load_user_presets()
+        except Exception as e:
+            from .constants import log
+            log.warning("Could not load user presets: %s", e)
+    if not _user_presets:
+        return PRESETS
+    return {**PRESETS, **_user_presets}
+
+
+def reload_user_presets():
+    """Forgets loaded user presets and the compiled matcher."""
+    global _user_presets, _matcher
+    _user_presets = None
+    _matcher = None
+
+
+def get_matcher():
+    global _matcher
+    if _matcher is None:
+        _matcher = PresetMatcher(get_all_presets())
+    return _matcher
+
+
 def get_preset_names():
     """Return list of preset names."""
-    return list(PRESETS.keys())
+    return list(get_all_presets().keys())
 
 def get_preset_tabs(preset_name):
     """Return list of tab patterns for a preset."""
-    return PRESETS.get(preset_name, [])
+    return get_all_presets().get(preset_name, [])
 
 def match_preset_to_categories(preset_name, available_categories):
     """
     Match a preset's tab patterns against available categories.
     Returns list of matching category names.
     """
-    patterns = get_preset_tabs(preset_name)
-    matches = []
-    
-    for cat in available_categories:
-        cat_lower = cat.lower()
-        for pattern in patterns:
-            if pattern.lower() in cat_lower or cat_lower in pattern.lower():
-                if cat not in matches:
-                    matches.append(cat)
-                break
-    
-    return matches
+    return list(get_matcher().match_all(available_categories).get(preset_name, []))
@@ -0,0 +1,70 @@
+"""
+Redraw coordinator for N-Panel Manager.
+
+Tagging a whole area redraws its main region too, which can be a heavy
+EEVEE/Cycles viewport, just to refresh a sidebar or a small overlay.
+Callers request only the regions that changed: the UI region of affected
+editors after a panel layout change, the originating WINDOW region for the
+overlay. Requests are collected and tagged once, from a zero-interval
+timer, so any number of them within a frame cost one walk over the screen.
+"""
+
+import bpy
+
+_sidebars = set()   # editor types whose UI regions need a redraw
+_regions = {}       # area pointer -> region types to redraw in that area
+
+
+def _schedule():
+    if not bpy.app.timers.is_registered(_flush):
+        bpy.app.timers.register(_flush, first_interval=0.0)
+
+
+def request_sidebars(space_types):
+    """Redraws the sidebar of every open editor of these types."""
+    _sidebars.update(space_types)
+    _schedule()
+
+
+def request_region(area_pointer, region_type):
+    """Redraws one region type of one area, given by as_pointer()."""
+    _regions.setdefault(area_pointer, set()).add(region_type)
+    _schedule()
+
+
+def _flush():
+    """Timer callback: tags everything requested since the last flush."""
+    sidebars = set(_sidebars)
+    regions = dict(_regions)
+    _sidebars.clear()
+    _regions.clear()
+
+    wm = bpy.context.window_manager
+    if wm is None:
+        return None
+    for window in wm.windows:
+        for area in window.screen.areas:
+            region_types = regions.get(area.as_pointer(), set())
+            if area.type in sidebars:
+                region_types = region_types | {'UI'}
+            if not region_types:
+                continue
+            for region in area.regions:
+                if region.type in region_types:
+                    region.tag_redraw()
+    return None
+
+
+def cancel():
+    _sidebars.clear()
+    _regions.clear()
+    if bpy.app.timers.is_registered(_flush):
+        bpy.app.timers.unregister(_flush)
+
+
+def register():
+    cancel()
+
+
+def unregister():
+    cancel()
@@ -0,0 +1,124 @@
+"""
+Rule-based group membership for N-Panel Manager.
+
+A rule picks tabs by what is registered right now instead of by fixed
+checkboxes, so a freshly installed addon's tab lands in the right groups on
+its own:
+
+    CATEGORY_GLOB   tab name matches a wildcard pattern ("Hard*", case-insensitive)
+    CATEGORY_REGEX  tab name matches a regular expression
+    MODULE          tab holds panels from a module or package ("hops", "bl_ext.*")
+    IDNAME_PREFIX   tab holds panels whose bl_idname starts with the prefix
+
+Rules are compiled once per (kind, pattern) and shared by every group using
+them. Each remembers its verdict per tab name or panel class, so a registry
+rebuild only tests what is new; the matched tabs are cached per registry
+version.
+"""
+
+import fnmatch
+import re
+from .constants import HIDDEN_CATEGORY, log
+
+RULE_KINDS = [
+    ('CATEGORY_GLOB', "Tab Name", "Tabs whose name matches a wildcard pattern, like 'Hard*'"),
+    ('CATEGORY_REGEX', "Tab Regex", "Tabs whose name matches a regular expression"),
+    ('MODULE', "Addon Module", "Tabs with panels from a module or package, like 'hops' or 'bl_ext.*'"),
+    ('IDNAME_PREFIX', "Panel ID Prefix", "Tabs with panels whose bl_idname starts with this, like 'HOPS_PT_'"),
+]
+
+_CATEGORY_KINDS = {'CATEGORY_GLOB', 'CATEGORY_REGEX'}
+
+_compiled = {}  # (kind, pattern) -> CompiledRule
+
+
+def _module_test(pattern):
+    def test(cls):
+        module = cls.__module__
+        return (module == pattern or module.startswith(pattern + ".")
+                or fnmatch.fnmatchcase(module, pattern))
+    return test
+
+
+def _idname_test(prefix):
+    def test(cls):
+        return (getattr(cls, 'bl_idname', '') or cls.__name__).startswith(prefix)
+    return test
+
+
+class CompiledRule:
+    """One rule, ready to test; remembers every verdict it made."""
+
+    __slots__ = ("kind", "pattern", "error", "_test", "_verdicts", "_version", "_tabs")
+
+    def __init__(self, kind, pattern):
+        self.kind = kind
+        self.pattern = pattern
+        self.error = None
+        self._verdicts = {}   # tab name or panel class -> bool
+        self._version = None
+        self._tabs = frozenset()
+
+        self._test = None
+        if not pattern:
+            return
+        try:
+            if kind == 'CATEGORY_GLOB':
+                self._test = re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+            elif kind == 'CATEGORY_REGEX':
+                self._test = re.compile(pattern).search
+            elif kind == 'MODULE':
+                self._test = _module_test(pattern)
+            elif kind == 'IDNAME_PREFIX':
+                self._test = _idname_test(pattern)
+        except re.error as e:
+            self.error = str(e)
+            log.warning("Invalid rule pattern %r: %s", pattern, e)
+
+    def tabs(self, registry):
+        """Frozenset of the tabs this rule selects in the current registry."""
+        if self._version == registry.version:
+            return self._tabs
+        if self._test is None:
+            self._version = registry.version
+            return self._tabs
+
+        old = self._verdicts
+        verdicts = {}
+        if self.kind in _CATEGORY_KINDS:
+            for name in registry.by_orig_category:
+                if name == HIDDEN_CATEGORY:
+                    continue
+                hit = old.get(name)
+                if hit is None:
+                    hit = bool(self._test(name))
+                verdicts[name] = hit
+            tabs = frozenset(name for name, hit in verdicts.items() if hit)
+        else:
+            tab_of = registry.tab_of
+            for cls in registry.panels:
+                hit = old.get(cls)
+                if hit is None:
+                    hit = bool(self._test(cls))
+                verdicts[cls] = hit
+            tabs = frozenset(tab_of[cls] for cls, hit in verdicts.items() if hit)
+            tabs -= {HIDDEN_CATEGORY}
+
+        # Only what is still registered is kept, vanished panels are let go
+        self._verdicts = verdicts
+        self._tabs = tabs
+        self._version = registry.version
+        return tabs
+
+
+def compile_rule(kind, pattern):
+    """Shared CompiledRule for a kind and pattern."""
+    key = (kind, pattern)
+    rule = _compiled.get(key)
+    if rule is None:
+        rule = _compiled[key] = CompiledRule(kind, pattern)
+    return rule
+
+
+def clear():
+    _compiled.clear()
@@ -0,0 +1,226 @@
+"""
+Coalescing switch scheduler for N-Panel Manager.
+
+Every group switch (scroll overlay, buttons, workspace and load handlers)
+goes through request_switch(). The selection is stored right away so the UI
+updates instantly, while the panel re-registration runs once from a
+bpy.app.timers callback on the main thread after input has settled.
+A burst of requests only ever applies its final target.
+"""
+
+import bpy
+from . import gating
+from . import usage
+from .constants import ADDON_ID, SHOW_ALL, log
+
+_pending = None      # Group index waiting to be applied, None = nothing
+_timer_active = False
+_applying = False
+_area_selection = {}  # area pointer -> group index, per-area groups only
+
+
+def get_prefs():
+    try:
+        return bpy.context.preferences.addons[ADDON_ID].preferences
+    except (AttributeError, KeyError):
+        return None
+
+
+def _select(prefs, index):
+    """Updates the stored selection without touching any panel."""
+    if index < 0 or index >= len(prefs.groups):
+        prefs.active_group_index = SHOW_ALL
+        prefs.is_filtering = False
+    else:
+        prefs.active_group_index = index
+        prefs.is_filtering = True
+
+
+def request_switch(index, delay=None):
+    """
+    Selects group ``index`` (SHOW_ALL restores every tab) and schedules it
+    to be applied once no other request arrived for ``delay`` seconds.
+    None uses the Settle Delay preference.
+    """
+    global _pending, _timer_active
+
+    prefs = get_prefs()
+    if not prefs:
+        return
+
+    _select(prefs, index)
+    _pending = prefs.active_group_index
+
+    if _applying:
+        # Called from inside a switch (e.g. a handler fired by re-registration),
+        # _flush picks the new target up when the current one is done.
+        return
+
+    if delay is None:
+        delay = prefs.switch_settle_delay
+
+    # Restart the settle window
+    if _timer_active and bpy.app.timers.is_registered(_flush):
+        bpy.app.timers.unregister(_flush)
+    bpy.app.timers.register(_flush, first_interval=delay)
+    _timer_active = True
+
+
+def apply_now(index):
+    """
+    Selects and applies group ``index`` synchronously, dropping anything
+    pending. For callers that already run deferred, like the startup restore.
+    """
+    global _applying
+
+    prefs = get_prefs()
+    if not prefs or _applying:
+        return
+    cancel()
+    _select(prefs, index)
+
+    _applying = True
+    try:
+        _apply(prefs.active_group_index)
+    finally:
+        _applying = False
+
+    if _pending is not None:
+        # Requested while we were busy, hand it to the timer
+        request_switch(_pending)
+
+
+def per_area_enabled(prefs):
+    """Per-area groups need the poll-gating engine."""
+    return prefs.per_area_groups and prefs.engine == 'POLL'
+
+
+def area_selection(prefs, pointer):
+    """Group index shown in an area, areas never switched follow the global selection."""
+    index = _area_selection.get(pointer)
+    if index is None or index >= len(prefs.groups):
+        return prefs.active_group_index if prefs.is_filtering else SHOW_ALL
+    return index
+
+
+def switch_area(area, index):
+    """
+    Per-area groups: selects and applies group ``index`` in one area right
+    away. With poll gating that is a table update, no settle delay needed.
+    """
+    from .core import PanelManager
+
+    prefs = get_prefs()
+    if not prefs:
+        return
+    if index < 0 or index >= len(prefs.groups):
+        index = SHOW_ALL
+    _prune_areas()
+    _area_selection[area.as_pointer()] = index
+    group_name = prefs.groups[index].name if index != SHOW_ALL else None
+    PanelManager.apply_area(bpy.context, area, group_name)
+    usage.record_use(prefs, index)
+    usage.schedule_prewarm(prefs, index)
+
+
+def _prune_areas():
+    """Forgets closed areas, so a reused pointer never inherits their group."""
+    if not _area_selection:
+        return
+    live = {
+        area.as_pointer()
+        for window in bpy.context.window_manager.windows
+        for area in window.screen.areas
+    }
+    stale = [pointer for pointer in _area_selection if pointer not in live]
+    stale.extend(pointer for pointer in gating.area_pointers() if pointer not in live)
+    for pointer in stale:
+        _area_selection.pop(pointer, None)
+    gating.clear_areas(stale)
+
+
+def group_removed(index):
+    """
+    Keeps per-area selections pointing at the same groups after group
+    ``index`` was removed. Areas that showed it follow the global selection.
+    """
+    from . import redraw
+
+    dropped = []
+    for pointer, selected in list(_area_selection.items()):
+        if selected == index:
+            del _area_selection[pointer]
+            dropped.append(pointer)
+        elif selected > index:
+            _area_selection[pointer] = selected - 1
+    gating.clear_areas(dropped)
+    for pointer in dropped:
+        redraw.request_region(pointer, 'UI')
+
+
+def clear_areas():
+    """Every area follows the global selection again."""
+    _area_selection.clear()
+    gating.clear_areas()
+
+
+def has_pending():
+    return _pending is not None
+
+
+def _apply(index):
+    from .core import PanelManager
+
+    prefs = get_prefs()
+    if not prefs:
+        return
+    if index < 0 or index >= len(prefs.groups):
+        PanelManager.restore_all(bpy.context)
+    else:
+        PanelManager.apply_group(bpy.context, prefs.groups[index].name)
+        usage.record_use(prefs, index)
+    usage.schedule_prewarm(prefs, index)
+
+
+def _flush():
+    """Timer callback: applies the pending target, once."""
+    global _pending, _timer_active, _applying
+
+    index = _pending
+    _pending = None
+    if index is None:
+        _timer_active = False
+        return None
+
+    _applying = True
+    try:
+        _apply(index)
+    except Exception as e:
+        log.error("Switch failed: %s", e)
+    finally:
+        _applying = False
+
+    if _pending is not None:
+        # A new target was requested while we were busy
+        prefs = get_prefs()
+        return prefs.switch_settle_delay if prefs else 0.0
+
+    _timer_active = False
+    return None
+
+
+def cancel():
+    """Drops any pending switch."""
+    global _pending, _timer_active
+    _pending = None
+    if _timer_active and bpy.app.timers.is_registered(_flush):
+        bpy.app.timers.unregister(_flush)
+    _timer_active = False
+
+
+def register():
+    cancel()
+
+
+def unregister():
+    cancel()
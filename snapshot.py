@@ -0,0 +1,96 @@
+"""
+On-disk snapshot of original panel categories for N-Panel Manager.
+
+Hidden panels carry HIDDEN_CATEGORY as their live bl_category, so once the
+runtime ``_npanel_orig_category`` attribute is lost (Reload Scripts, addon
+re-enable) the real tab can't be read back from the class. The snapshot keeps
+it per panel class identity ("module:ClassName") in the user config folder.
+"""
+
+import json
+import os
+import bpy
+from .constants import ADDON_ID, HIDDEN_CATEGORY, log
+
+SNAPSHOT_VERSION = 1
+_FILENAME = "original_categories.json"
+
+_categories = {}   # "module:ClassName" -> original category
+_dirty = False
+
+
+def panel_key(cls):
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _path():
+    directory = bpy.utils.user_resource('CONFIG', path=ADDON_ID, create=True)
+    return os.path.join(directory, _FILENAME)
+
+
+def load():
+    """Reads the snapshot file. A missing or outdated file starts empty."""
+    global _categories, _dirty
+
+    _categories = {}
+    _dirty = False
+    try:
+        with open(_path(), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        log.warning("Ignoring unreadable category snapshot: %s", e)
+        return
+
+    if data.get("version") != SNAPSHOT_VERSION:
+        log.info("Category snapshot version changed, starting fresh")
+        _dirty = True
+        return
+
+    for key, category in data.get("panels", {}).items():
+        # Never trust a snapshot that recorded our own hidden tab
+        if isinstance(category, str) and category != HIDDEN_CATEGORY:
+            _categories[key] = category
+        else:
+            _dirty = True
+
+
+def save():
+    """Writes the snapshot if anything changed since it was loaded."""
+    global _dirty
+
+    if not _dirty:
+        return
+    path = _path()
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": SNAPSHOT_VERSION, "panels": _categories}, f)
+        # Atomic swap so a crash never leaves a half-written snapshot
+        os.replace(tmp_path, path)
+        _dirty = False
+    except Exception as e:
+        log.warning("Could not save category snapshot: %s", e)
+
+
+def resolve(cls, live_category):
+    """
+    Returns the original category of a panel seen for the first time this
+    session, healing the snapshot when it disagrees with the live class.
+    """
+    global _dirty
+
+    key = panel_key(cls)
+    saved = _categories.get(key)
+
+    if live_category == HIDDEN_CATEGORY:
+        # Hidden by us in an earlier session: only the snapshot knows the tab.
+        # Without an entry the panel stays put rather than recording our tab.
+        return saved or HIDDEN_CATEGORY
+
+    if saved != live_category:
+        # New panel, or its addon moved it to another tab since: trust the class
+        _categories[key] = live_category
+        _dirty = True
+    return live_category
@@ -1,5 +1,162 @@
+import re
 import bpy
-from .constants import ADDON_ID
+from .constants import ADDON_ID, HIDDEN_CATEGORY
+from .core import registry
+from .preferences import find_cycle, group_members, resolve_members
+from .rules import compile_rule
+
+
+class CategorySearchIndex:
+    """
+    Lowercased names, word tokens and alphabetical order of the shared
+    category table. The table only grows, so its length is the cache key.
+    """
+
+    _TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+
+    def __init__(self, names):
+        self.size = len(names)
+        self.names = names
+        self.lowered = [name.lower() for name in names]
+        self.tokens = [tuple(t for t in self._TOKEN_SPLIT.split(low) if t) for low in self.lowered]
+        alphabetical = sorted(range(self.size), key=lambda i: self.lowered[i])
+        # flt_neworder wants, per item, its position in the displayed list
+        self.alpha_order = [0] * self.size
+        for position, i in enumerate(alphabetical):
+            self.alpha_order[i] = position
+
+    def score(self, i, query):
+        """Fuzzy match rank of a category for a lowercase query, 0 = no match."""
+        name = self.lowered[i]
+        if name == query:
+            return 100
+        if name.startswith(query):
+            return 80
+        if any(token.startswith(query) for token in self.tokens[i]):
+            return 60
+        if query in name:
+            return 40
+        # Subsequence: every query character in order, tighter spans rank higher
+        pos = -1
+        first = None
+        for ch in query:
+            pos = name.find(ch, pos + 1)
+            if pos < 0:
+                return 0
+            if first is None:
+                first = pos
+        span = pos - first + 1
+        return 10 + 20 * len(query) // span
+
+
+_search_index = None
+_filter_cache = {}  # filter inputs -> (flt_flags, flt_neworder)
+
+
+def get_search_index(entries):
+    global _search_index
+    if _search_index is None or _search_index.size != len(entries):
+        _search_index = CategorySearchIndex([entry.name for entry in entries])
+        _filter_cache.clear()
+    return _search_index
+
+
+class NPANEL_UL_Categories(bpy.types.UIList):
+    """Included Tabs editor over the shared category table, only visible rows are drawn."""
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        prefs = data
+        group_index = prefs.active_group_index
+        if not 0 <= group_index < len(prefs.groups):
+            return
+        enabled = item.name in group_members(prefs, prefs.groups[group_index])
+        
+        row = layout.row(align=True)
+        # Tabs of disabled addons stay listed, greyed out
+        row.active = item.available
+        op = row.operator("npanel.toggle_category", text="",
+                          icon='CHECKBOX_HLT' if enabled else 'CHECKBOX_DEHLT', emboss=False)
+        op.group_index = group_index
+        op.category = item.name
+        row.label(text=item.name)
+
+    def draw_filter(self, context, layout):
+        # Search and mode live in the editor above the list
+        pass
+
+    def filter_items(self, context, data, propname):
+        prefs = data
+        entries = getattr(data, propname)
+        index = get_search_index(entries)
+        
+        query = prefs.search_filter.strip().lower()
+        mode = prefs.category_filter_mode
+        members = frozenset()
+        space_types = frozenset()
+        if 0 <= prefs.active_group_index < len(prefs.groups):
+            group = prefs.groups[prefs.active_group_index]
+            space_types = frozenset(group.space_types)
+            if mode != 'ALL':
+                members = group_members(prefs, group)
+        reg = registry.ensure()
+        
+        key = (index.size, query, mode, members, space_types, reg.version)
+        cached = _filter_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Tabs of editors the group doesn't filter are left out; tabs no
+        # editor has right now stay listed (greyed out) so they can be edited
+        elsewhere = reg.by_orig_category.keys() - reg.categories_in(space_types)
+        
+        flags = [0] * index.size
+        scores = {}
+        for i in range(index.size):
+            if mode != 'ALL' and (index.names[i] in members) != (mode == 'ENABLED'):
+                continue
+            if index.names[i] in elsewhere:
+                continue
+            if query:
+                score = index.score(i, query)
+                if not score:
+                    continue
+                scores[i] = score
+            flags[i] = self.bitflag_filter_item
+        
+        if query:
+            ranked = sorted(scores, key=lambda i: (-scores[i], index.alpha_order[i]))
+            ranked.extend(sorted((i for i in range(index.size) if i not in scores),
+                                 key=lambda i: index.alpha_order[i]))
+            order = [0] * index.size
+            for position, i in enumerate(ranked):
+                order[i] = position
+        else:
+            order = index.alpha_order
+        
+        if len(_filter_cache) > 64:
+            _filter_cache.clear()
+        _filter_cache[key] = (flags, order)
+        return flags, order
+
+
+class NPANEL_UL_Dashboard(bpy.types.UIList):
+    """Quick group switch buttons."""
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        prefs = data
+        is_active = (prefs.is_filtering and prefs.active_group_index == index)
+        
+        col = layout.column(align=True)
+        col.scale_y = 1.4  # Larger buttons
+        if is_active:
+            col.alert = True
+        
+        op = col.operator("npanel.apply_group", text=item.name, icon='CHECKMARK' if is_active else 'BLANK1', depress=is_active)
+        op.group_index = index
+
+    def draw_filter(self, context, layout):
+        pass
+
 
 class NPANEL_PT_Main(bpy.types.Panel):
     bl_label = "N-Panel Manager"
@@ -39,19 +196,10 @@ class NPANEL_PT_Main(bpy.types.Panel):
         # DASHBOARD GRID (Quick Group Switches)
         # ============================================================
         if prefs.groups:
-            grid = layout.grid_flow(row_major=True, columns=2, even_columns=True, even_rows=True, align=True)
-            
-            for index, group in enumerate(prefs.groups):
-                is_active = (prefs.is_filtering and prefs.active_group_index == index)
-                
-                col = grid.column(align=True)
-                col.scale_y = 1.4  # Larger buttons
-                
-                if is_active:
-                    col.alert = True
-                
-                op = col.operator("npanel.apply_group", text=group.name, icon='CHECKMARK' if is_active else 'BLANK1', depress=is_active)
-                op.group_index = index
+            layout.template_list(
+                "NPANEL_UL_Dashboard", "", prefs, "groups", prefs, "dashboard_index",
+                type='GRID', columns=2, rows=min(len(prefs.groups), 4)
+            )
         else:
             layout.label(text="No groups yet. Add one below.", icon='INFO')
             
@@ -87,8 +235,74 @@ class NPANEL_PT_Main(bpy.types.Panel):
             edit_box = layout.box()
             edit_box.label(text=f"Edit: {group.name}", icon='GREASEPENCIL')
             
-            edit_box.prop(group, "name", text="Name")
+            name_row = edit_box.row(align=True)
+            name_row.prop(group, "name", text="Name")
+            name_row.operator("npanel.preview_group", text="", icon='HIDE_OFF').group_index = prefs.active_group_index
             edit_box.prop_search(group, "workspace_name", bpy.data, "workspaces", text="Auto-Activate on Workspace")
+            edit_box.row(align=True).prop(group, "space_types")
+            
+            # Included groups, flattened when the group is applied
+            inc_box = edit_box.box()
+            inc_row = inc_box.row()
+            inc_row.label(text="Includes", icon='LINKED')
+            inc_row.operator("npanel.add_include", text="", icon='ADD', emboss=False).group_index = prefs.active_group_index
+            for i, include in enumerate(group.includes):
+                row = inc_box.row(align=True)
+                row.prop(include, "mode", text="")
+                row.prop_search(include, "group_name", prefs, "groups", text="")
+                op = row.operator("npanel.remove_include", text="", icon='X')
+                op.group_index = prefs.active_group_index
+                op.index = i
+            if len(group.includes):
+                cycle = find_cycle(prefs, group)
+                if cycle:
+                    inc_box.label(text="Cycle: " + " > ".join(cycle), icon='ERROR')
+            
+            # Rules, matched against the panel index on every rebuild
+            rule_box = edit_box.box()
+            rule_row = rule_box.row()
+            rule_row.label(text="Rules", icon='FILTER')
+            rule_row.operator("npanel.add_rule", text="", icon='ADD', emboss=False).group_index = prefs.active_group_index
+            if len(group.rules):
+                reg = registry.ensure()
+            for i, rule in enumerate(group.rules):
+                row = rule_box.row(align=True)
+                row.prop(rule, "mode", text="")
+                row.prop(rule, "kind", text="")
+                row.prop(rule, "pattern", text="")
+                compiled = compile_rule(rule.kind, rule.pattern)
+                if compiled.error:
+                    row.alert = True
+                    row.label(text="", icon='ERROR')
+                else:
+                    row.label(text=str(len(compiled.tabs(reg))))
+                op = row.operator("npanel.remove_rule", text="", icon='X')
+                op.group_index = prefs.active_group_index
+                op.index = i
+            
+            # Whole addons, shown or hidden panel by panel
+            addon_box = edit_box.box()
+            addon_row = addon_box.row()
+            addon_row.label(text="Addons", icon='PLUGIN')
+            addon_row.operator("npanel.add_addon", text="", icon='ADD', emboss=False).group_index = prefs.active_group_index
+            if len(group.addons):
+                reg = registry.ensure()
+            for i, entry in enumerate(group.addons):
+                row = addon_box.row(align=True)
+                row.prop(entry, "mode", text="")
+                row.label(text=entry.module)
+                panels = reg.by_addon.get(entry.module)
+                if panels:
+                    row.label(text=f"{len(panels)} panels, {len(reg.addon_categories(entry.module))} tabs")
+                else:
+                    row.alert = True
+                    row.label(text="Not installed", icon='ERROR')
+                op = row.operator("npanel.remove_addon", text="", icon='X')
+                op.group_index = prefs.active_group_index
+                op.index = i
+            
+            if len(group.includes) or len(group.rules):
+                edit_box.label(text=f"{len(resolve_members(prefs, group))} tabs after includes and rules", icon='INFO')
             
             edit_box.separator()
             
@@ -97,34 +311,47 @@ class NPANEL_PT_Main(bpy.types.Panel):
             row.prop(prefs, "search_filter", text="", icon='VIEWZOOM')
             if prefs.search_filter:
                 row.operator("npanel.clear_search", text="", icon='X')
+            edit_box.row(align=True).prop(prefs, "category_filter_mode", expand=True)
             
             edit_box.label(text="Included Tabs:")
-            
-            col = edit_box.column(align=True)
-            search_term = prefs.search_filter.lower()
-            for cat in group.categories:
-                # Filter by search
-                if search_term and search_term not in cat.name.lower():
-                    continue
-                row = col.row(align=True)
-                row.prop(cat, "enabled", text="")
-                row.label(text=cat.name)
+            edit_box.template_list(
+                "NPANEL_UL_Categories", "", prefs, "category_table", prefs, "category_index", rows=8
+            )
         
         # ============================================================
         # QUICK PRESETS
         # ============================================================
         layout.separator()
         preset_box = layout.box()
-        preset_box.label(text="Quick Presets", icon='PRESET')
+        preset_row = preset_box.row()
+        preset_row.label(text="Quick Presets", icon='PRESET')
+        preset_row.operator("npanel.reload_presets", text="", icon='FILE_REFRESH', emboss=False)
         
-        from .presets import get_preset_names
+        from .presets import get_matcher
+        # Matches are cached per registry version, so redraws don't rescan
+        reg = registry.ensure()
+        matches = get_matcher().match_all(reg.by_orig_category.keys() - {HIDDEN_CATEGORY},
+                                          key=("registry", reg.version))
         grid = preset_box.grid_flow(row_major=True, columns=2, even_columns=True)
-        for preset_name in get_preset_names():
-            op = grid.operator("npanel.apply_preset", text=preset_name)
+        for preset_name, found in matches.items():
+            sub = grid.row()
+            sub.enabled = bool(found)
+            op = sub.operator("npanel.apply_preset", text=f"{preset_name} ({len(found)})")
             op.preset_name = preset_name
 
+classes = (
+    NPANEL_UL_Categories,
+    NPANEL_UL_Dashboard,
+    NPANEL_PT_Main,
+)
+
 def register():
-    bpy.utils.register_class(NPANEL_PT_Main)
+    global _search_index
+    _search_index = None
+    _filter_cache.clear()
+    for cls in classes:
+        bpy.utils.register_class(cls)
 
 def unregister():
-    bpy.utils.unregister_class(NPANEL_PT_Main)
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
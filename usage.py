@@ -0,0 +1,107 @@
+"""
+Group usage tracking and plan pre-warming for N-Panel Manager.
+
+Every applied group bumps its use count and last-used time (stored on the
+group, so they survive restarts). After a switch, an idle timer plans the
+groups most likely to come next, the scroll neighbours and the most used
+ones, one group per tick, so their hidden sets and diffs are already cached
+in the planner when they are reached.
+
+The scroll ring is the order Ctrl+Shift+Scroll cycles through: storage order,
+or most recently used first so the groups in use are one notch away.
+"""
+
+import time
+import bpy
+from .constants import SHOW_ALL, log
+
+# Seconds of quiet after a switch before pre-warming starts
+PREWARM_DELAY = 0.5
+
+# How many of the most used groups are kept warm besides the neighbours
+PREWARM_TOP = 3
+
+_queue = []  # group names still to plan
+
+
+def record_use(prefs, index):
+    """Counts an applied group."""
+    if 0 <= index < len(prefs.groups):
+        group = prefs.groups[index]
+        group.use_count += 1
+        group.last_used = time.time()
+
+
+def scroll_ring(prefs):
+    """Group indices in scroll order, SHOW_ALL last."""
+    indices = list(range(len(prefs.groups)))
+    if prefs.scroll_order == 'MRU':
+        groups = prefs.groups
+        # Most recent first, never used ones keep storage order at the end
+        indices.sort(key=lambda i: -groups[i].last_used)
+    indices.append(SHOW_ALL)
+    return indices
+
+
+def step(ring, current, direction):
+    """Index ``direction`` notches away from ``current`` on the ring."""
+    position = ring.index(current) if current in ring else len(ring) - 1
+    return ring[(position + direction) % len(ring)]
+
+
+def _candidates(prefs, current):
+    ring = scroll_ring(prefs)
+    names = []
+    for direction in (1, -1):
+        index = step(ring, current, direction)
+        if index != SHOW_ALL:
+            names.append(prefs.groups[index].name)
+    by_use = sorted(range(len(prefs.groups)), key=lambda i: -prefs.groups[i].use_count)
+    names.extend(prefs.groups[i].name for i in by_use[:PREWARM_TOP] if prefs.groups[i].use_count)
+    if 0 <= current < len(prefs.groups):
+        names = [n for n in names if n != prefs.groups[current].name]
+    # Unique, keeping the priority order
+    return list(dict.fromkeys(names))
+
+
+def schedule_prewarm(prefs, current):
+    """Queues the likely next groups, planned once the UI is idle."""
+    _queue[:] = _candidates(prefs, current)
+    if not _queue:
+        return
+    if bpy.app.timers.is_registered(_prewarm_step):
+        bpy.app.timers.unregister(_prewarm_step)
+    bpy.app.timers.register(_prewarm_step, first_interval=PREWARM_DELAY)
+
+
+def _prewarm_step():
+    """Timer callback: plans one queued group per tick."""
+    from . import scheduler
+    from .core import PanelManager
+
+    if scheduler.has_pending():
+        # A switch is about to run, it will queue its own neighbours
+        return None
+    if not _queue:
+        return None
+    name = _queue.pop(0)
+    try:
+        plan = PanelManager.plan_group(bpy.context, name)
+        log.debug("Pre-warmed %s: %s", name, plan)
+    except Exception as e:
+        log.warning("Pre-warming %s failed: %s", name, e)
+    return 0.0 if _queue else None
+
+
+def cancel():
+    _queue.clear()
+    if bpy.app.timers.is_registered(_prewarm_step):
+        bpy.app.timers.unregister(_prewarm_step)
+
+
+def register():
+    cancel()
+
+
+def unregister():
+    cancel()
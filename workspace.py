@@ -0,0 +1,79 @@
+"""
+Workspace auto-activation for N-Panel Manager.
+
+Workspace changes are picked up through a bpy.msgbus subscription on
+Window.workspace, so nothing runs during playback or edits. Linked groups are
+found through a workspace name -> group index map that is only rebuilt after
+the group list changed.
+"""
+
+import bpy
+from . import scheduler
+from .constants import log
+
+# Owner handle for our msgbus subscriptions
+_msgbus_owner = object()
+
+_index = None            # workspace name -> group index, None = stale
+_last_workspace = None
+
+
+def invalidate_index():
+    """Drops the workspace index, it is rebuilt on the next workspace change."""
+    global _index
+    _index = None
+
+
+def _get_index(prefs):
+    global _index
+    if _index is None:
+        _index = {}
+        for i, group in enumerate(prefs.groups):
+            # First group linked to a workspace wins, like the old linear scan
+            if group.workspace_name and group.workspace_name not in _index:
+                _index[group.workspace_name] = i
+    return _index
+
+
+def _on_workspace_changed():
+    global _last_workspace
+
+    workspace = bpy.context.workspace
+    if workspace is None or workspace.name == _last_workspace:
+        return
+    _last_workspace = workspace.name
+
+    prefs = scheduler.get_prefs()
+    if not prefs:
+        return
+
+    index = _get_index(prefs).get(workspace.name)
+    if index is not None:
+        log.info("Workspace '%s' detected. Switching to group '%s'",
+                 workspace.name, prefs.groups[index].name)
+        scheduler.request_switch(index)
+
+
+def subscribe():
+    """(Re)subscribes to workspace changes. Loading a file drops subscriptions."""
+    global _last_workspace
+
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.Window, "workspace"),
+        owner=_msgbus_owner,
+        args=(),
+        notify=_on_workspace_changed,
+    )
+    workspace = getattr(bpy.context, "workspace", None)
+    _last_workspace = workspace.name if workspace else None
+
+
+def register():
+    invalidate_index()
+    subscribe()
+
+
+def unregister():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    invalidate_index()